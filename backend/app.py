@@ -1,92 +1,51 @@
 # backend/app.py
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 import os
-import json
+import io
 import threading
 import time
-from arch import arch_model
-from datetime import timedelta, datetime
-from math import sqrt
-from textblob import TextBlob
-from dotenv import load_dotenv
-import requests
-from pmdarima import auto_arima
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
 import realtime as rt          # ← real-time yfinance layer
+import risk
+import caching
+import forecast_service
+import forecast_store
+import forecasting
+import forecast_jobs
+import sentiment
+import live_stream
+import portfolio
+import views
 
 app = Flask(__name__)
 CORS(app)
 
-# ============================
-#  SYMBOL → REAL COMPANY NAME MAP (for news query)
-# ============================
-SYMBOL_MAP = {
-    "RELIANCE":    "Reliance Industries",
-    "TCS":         "Tata Consultancy Services",
-    "HDFCBANK":    "HDFC Bank",
-    "INFY":        "Infosys",
-    "ICICIBANK":   "ICICI Bank",
-    "HINDUNILVR":  "Hindustan Unilever",
-    "SBIN":        "State Bank of India",
-    "BHARTIARTL":  "Bharti Airtel",
-    "KOTAKBANK":   "Kotak Mahindra Bank",
-    "WIPRO":       "Wipro",
-    "HCLTECH":     "HCL Technologies",
-    "AXISBANK":    "Axis Bank",
-    "ASIANPAINT":  "Asian Paints",
-    "MARUTI":      "Maruti Suzuki",
-    "BAJAJ-AUTO":  "Bajaj Auto",
-    "MM":          "Mahindra Mahindra",
-    "TATASTEEL":   "Tata Steel",
-    "HINDALCO":    "Hindalco Industries",
-    "SUNPHARMA":   "Sun Pharmaceutical",
-    "DRREDDY":     "Dr Reddy Laboratories",
-    "CIPLA":       "Cipla",
-    "NTPC":        "NTPC",
-    "POWERGRID":   "Power Grid Corporation",
-    "COALINDIA":   "Coal India",
-    "ONGC":        "ONGC Oil Gas",
-    "ITC":         "ITC India",
-    "LT":          "Larsen Toubro",
-    "ULTRACEMCO":  "UltraTech Cement",
-    "TECHM":       "Tech Mahindra",
-    "ADANIPORTS":  "Adani Ports",
-}
-
 # ============================
 #  PATHS
 # ============================
 BASE_DIR = os.path.dirname(__file__)
-DATA_CSV = os.path.join(BASE_DIR, "data", "market_data.csv")
-HOLDINGS_CSV = os.path.join(BASE_DIR, "data", "holdings.csv")
-CACHE_DIR = os.path.join(BASE_DIR, "data", "forecast_cache")
-os.makedirs(CACHE_DIR, exist_ok=True)
+HOLDINGS_CSV = os.environ.get("HOLDINGS_CSV", os.path.join(BASE_DIR, "data", "holdings.csv"))
 
-# Cache TTL: recompute forecasts older than this many seconds (24 hours)
-CACHE_TTL_SECONDS = 86400
+# The price matrix, the forecast store paths and the TTL live in
+# forecast_service, which the batch CLI imports without the Flask app
+DATA_CSV          = forecast_service.DATA_CSV
+CACHE_DIR         = forecast_service.CACHE_DIR
+PRICES            = forecast_service.PRICES
+CACHE_TTL_SECONDS = forecast_service.CACHE_TTL_SECONDS
 
 # ============================
 #  HELPERS
 # ============================
 def read_timeseries():
-    """Reads the wide CSV: Date + many tickers."""
+    """Reads the wide CSV: Date + many tickers.
+    Served from the shared price store — parsed once, reloaded on mtime change."""
     if not os.path.exists(DATA_CSV):
         return pd.DataFrame()
-
-    df = pd.read_csv(DATA_CSV)
-
-    if "Date" not in df.columns:
-        return pd.DataFrame()
-
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(how="all", subset=[c for c in df.columns if c != "Date"])
-    df = df.sort_values("Date").reset_index(drop=True)
-
-    # Fill missing stock prices
-    df = df.ffill().bfill()
-    return df
+    return PRICES.frame()
 
 
 def latest_and_prev_prices(df):
@@ -105,38 +64,7 @@ def latest_and_prev_prices(df):
     return last, prev, last_date.strftime("%d-%m-%Y")
 
 
-def get_price_series(symbol):
-    """Return a clean Date + Price series.
-    Accepts any form: clean symbol, CSV col, or yf ticker.
-    Prefers CSV data (instant) — falls back to live yfinance if CSV is missing."""
-    clean = rt.resolve(symbol) or symbol
-
-    # ── Try CSV first (instant, no network) ──────────────────────
-    df = read_timeseries()
-    col = symbol if symbol in df.columns else None
-    if col is None:
-        for csv_col, clean_sym in rt.CSV_TO_SYMBOL.items():
-            if clean_sym == clean and csv_col in df.columns:
-                col = csv_col
-                break
-    if not df.empty and col:
-        out = df[["Date", col]].dropna().rename(columns={col: "Price"})
-        out["Price"] = pd.to_numeric(out["Price"], errors="coerce")
-        out = out.dropna()
-        if not out.empty:
-            return out
-
-    # ── Fallback: live yfinance history ──────────────────────────
-    live = rt.get_history(clean, period="5y")
-    if live:
-        ldf = pd.DataFrame(live)
-        ldf["Date"]  = pd.to_datetime(ldf["date"])
-        ldf["Price"] = pd.to_numeric(ldf["price"], errors="coerce")
-        ldf = ldf[["Date", "Price"]].dropna().sort_values("Date").reset_index(drop=True)
-        if not ldf.empty:
-            return ldf
-
-    return pd.DataFrame()
+get_price_series = forecast_service.get_price_series
 
 
 # ===========================================================
@@ -196,41 +124,125 @@ def api_stock(symbol):
     })
 
 
+def json_body(obj) -> bytes:
+    """Serialize exactly like jsonify() (sorted keys, compact) for responses
+    that are built once and cached as bytes."""
+    return (app.json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+
+# ===========================================================
+#  ROLLING CLOSES (5d / 20d MOMENTUM)
+# ===========================================================
+# The last CLOSES_DEPTH daily closes of the universe, seeded from the price
+# matrix and extended by every quote refresh.  When the CSV is older than
+# the live data (or a symbol is live-only) one bulk yfinance download in
+# the background fills the gap.
+CLOSES_DEPTH    = 64
+CLOSES_GAP_DAYS = 5                # calendar days between CSV end and live data
+CLOSES = risk.RollingCloses(rt.SYMBOL_LIST, depth=CLOSES_DEPTH)
+_closes_seeded_for = None          # the PRICES matrix the buffer was seeded from
+_closes_seed_day   = None
+_closes_live_syms  = []
+_closes_backfill   = None          # background backfill thread (once per seed)
+_closes_lock = threading.Lock()
+
+
+def _ensure_closes():
+    global _closes_seeded_for, _closes_seed_day, _closes_live_syms, _closes_backfill
+    matrix = PRICES.matrix
+    if _closes_seeded_for is matrix:
+        return
+    with _closes_lock:
+        if _closes_seeded_for is matrix:
+            return
+        csv_syms, idx, live_syms = _split_universe()
+        ok = ~PRICES.dates.isna()
+        rows = np.flatnonzero(ok)[-CLOSES_DEPTH:]
+        days = PRICES.dates[rows].strftime("%Y-%m-%d").tolist()
+        tail = pd.DataFrame(matrix[np.ix_(rows, idx)]).ffill().to_numpy()
+        CLOSES.seed(days, csv_syms, tail)
+        _closes_seed_day  = days[-1] if days else None
+        _closes_live_syms = live_syms
+        _closes_backfill  = None
+        _closes_seeded_for = matrix
+
+
+def _backfill_closes():
+    """Background: one bulk download of recent closes for the whole
+    universe, then replay the current quotes and rebuild the views."""
+    days, syms, closes = rt.get_recent_closes(period="3mo")
+    if closes is None:
+        return
+    with _closes_lock:
+        if _closes_gap():
+            CLOSES.seed(days, syms, pd.DataFrame(closes).ffill().to_numpy())
+        else:
+            for sym in _closes_live_syms:
+                if sym in syms:
+                    j = syms.index(sym)
+                    CLOSES.seed_column(sym, days, closes[:, j])
+    print(f"[closes] Backfilled {len(syms)} symbols × {len(days)} days")
+    _fold_closes(rt.get_all_quotes(), backfill=False)
+    VIEWS.refresh()
+
+
+def _closes_gap() -> bool:
+    """Live quotes are more than CLOSES_GAP_DAYS past the seeded CSV."""
+    last = CLOSES.last_day
+    if not (_closes_seed_day and last):
+        return _closes_seed_day is None
+    return (pd.Timestamp(last) - pd.Timestamp(_closes_seed_day)).days > CLOSES_GAP_DAYS
+
+
+def _fold_closes(quotes, backfill=True):
+    """Realtime refresh listener: fold live closes into the buffer (runs
+    before the view rebuild so insights see this refresh's closes)."""
+    global _closes_backfill
+    if not quotes:
+        return
+    _ensure_closes()
+    by_day = {}
+    for sym, q in quotes.items():
+        by_day.setdefault(q.get("date"), {})[sym] = q["ltp"]
+    for day in sorted(d for d in by_day if d):
+        CLOSES.update(day, by_day[day])
+    if backfill and _closes_backfill is None and (_closes_live_syms or _closes_gap()):
+        _closes_backfill = threading.Thread(target=_backfill_closes, name="closes-backfill", daemon=True)
+        _closes_backfill.start()
+
+
+def closes_momentum() -> dict:
+    """{symbol: {5: pct, 20: pct}} from the rolling close buffer."""
+    _ensure_closes()
+    return CLOSES.momentum((5, 20))
+
+
+
 # ===========================================================
 #  MARKET MOVERS (TOP GAINERS / LOSERS)
 # ===========================================================
+# Movers, most-bought and insights are built once per quote refresh and
+# served as pre-serialized JSON (see views.py)
+VIEWS = views.ViewCache(lambda obj: json_body(obj).decode(), views={
+    **views.VIEWS,
+    "market_insights": lambda quotes: views.market_insights(quotes, closes_momentum()),
+})
+
 @app.route("/api/market-movers")
 def api_market_movers():
-    quotes = rt.get_all_quotes()
+    body = VIEWS.get("market_movers")
+    if body is not None:
+        return app.response_class(body, mimetype="application/json")
 
+    # No live quotes yet → fall back to CSV
     movers = []
-    for sym, info in rt.STOCKS.items():
-        q = quotes.get(sym)
-        if not q:
+    df = read_timeseries()
+    last, prev, last_date = latest_and_prev_prices(df)
+    for sym in last.index:
+        if pd.isna(last[sym]) or pd.isna(prev[sym]):
             continue
-        movers.append({
-            "symbol":     sym,
-            "name":       info["name"],
-            "sector":     info["sector"],
-            "ltp":        q["ltp"],
-            "change":     q["change"],
-            "pct_change": q["change_pct"],
-            "open":       q.get("open"),
-            "high":       q.get("high"),
-            "low":        q.get("low"),
-            "volume":     q.get("volume"),
-            "source":     "live",
-        })
-
-    if not movers:
-        # Fallback to CSV
-        df = read_timeseries()
-        last, prev, last_date = latest_and_prev_prices(df)
-        for sym in last.index:
-            if pd.isna(last[sym]) or pd.isna(prev[sym]):
-                continue
-            pct = (last[sym] - prev[sym]) / prev[sym] * 100
-            movers.append({"symbol": sym, "name": sym, "ltp": float(last[sym]), "pct_change": round(pct, 2), "source": "csv"})
+        pct = (last[sym] - prev[sym]) / prev[sym] * 100
+        movers.append({"symbol": sym, "name": sym, "ltp": float(last[sym]), "pct_change": round(pct, 2), "source": "csv"})
 
     movers_df = pd.DataFrame(movers)
     gainers = movers_df.sort_values("pct_change", ascending=False).head(10).to_dict("records")
@@ -246,53 +258,118 @@ def api_market_movers():
 # ===========================================================
 #  PORTFOLIO (synthetic)
 # ===========================================================
-@app.route("/api/portfolio")
-def api_portfolio():
-    df = read_timeseries()
-    if df.empty:
-        return jsonify({"holdings": [], "totals": {}})
+_portfolio_basis = None
 
-    last, prev, date = latest_and_prev_prices(df)
-    quotes = rt.get_all_quotes()   # live prices
 
-    rows = []
-    for sym in last.index:
-        # Prefer live LTP, fall back to CSV
-        live_q = rt.get_quote(sym)
-        ltp     = live_q["ltp"]        if live_q else float(last[sym])
-        prev_ltp = live_q["prev_close"] if live_q else (float(prev[sym]) if not pd.isna(prev[sym]) else ltp)
+def portfolio_basis() -> portfolio.PriceBasis:
+    """First / last / previous CSV prices, computed once per price matrix."""
+    global _portfolio_basis
+    matrix = PRICES.matrix
+    if _portfolio_basis is None or _portfolio_basis.matrix is not matrix:
+        _portfolio_basis = portfolio.PriceBasis(matrix, PRICES.columns)
+    return _portfolio_basis
 
-        series = pd.to_numeric(df[sym], errors="coerce").dropna()
-        if series.empty:
-            continue
-        first_price   = series.iloc[0]
-        invested      = first_price * 1
-        current_value = ltp * 1
-        today_pl      = round(ltp - prev_ltp, 2)
-        profit_loss   = current_value - invested
-        profit_loss_pct = (profit_loss / invested * 100) if invested != 0 else 0
-
-        rows.append({
-            "symbol":          sym,
-            "quantity":        1,
-            "avg_cost":        round(first_price, 2),
-            "ltp":             round(ltp, 2),
-            "invested":        round(invested, 2),
-            "current_value":   round(current_value, 2),
-            "profit_loss":     round(profit_loss, 2),
-            "profit_loss_pct": round(profit_loss_pct, 2),
-            "today_pl":        today_pl,
-            "source":          "live" if live_q else "csv",
-        })
 
-    totals = {
-        "total_invested":      sum(r["invested"] for r in rows),
-        "total_current_value": sum(r["current_value"] for r in rows),
-        "total_profit_loss":   sum(r["profit_loss"] for r in rows),
-        "total_today_pl":      sum(r["today_pl"] for r in rows),
-        "date": datetime.now().strftime("%d-%m-%Y"),
-    }
-    return jsonify({"holdings": rows, "totals": totals})
+# Positions from HOLDINGS_CSV (reloaded when the file changes) — or, without
+# the file, one share of every CSV symbol.  Live quotes are folded in by a
+# refresh listener, repricing only the symbols that changed.
+_book = None
+_book_key = (None, None)           # (holdings.csv mtime, PriceBasis) it was built from
+_book_lock = threading.Lock()
+
+
+def holdings_book() -> portfolio.HoldingsBook:
+    global _book, _book_key
+    try:
+        mtime = os.path.getmtime(HOLDINGS_CSV)
+    except OSError:
+        mtime = None
+    basis = portfolio_basis()
+    if _book is None or _book_key[0] != mtime or _book_key[1] is not basis:
+        with _book_lock:
+            if _book is None or _book_key[0] != mtime or _book_key[1] is not basis:
+                t0 = time.time()
+                book = None
+                if mtime is not None:
+                    try:
+                        rejected = []
+                        book = portfolio.HoldingsBook(portfolio.read_lots(HOLDINGS_CSV, rejected), basis,
+                                                      source=os.path.basename(HOLDINGS_CSV))
+                        if rejected:
+                            print(f"[holdings] Skipped {len(rejected)} invalid rows in {HOLDINGS_CSV} "
+                                  f"(first: row {rejected[0]['row']}, {rejected[0]['reason']})")
+                    except (OSError, ValueError) as e:
+                        print(f"[holdings] Could not load {HOLDINGS_CSV}: {e}")
+                if book is None:
+                    book = portfolio.HoldingsBook.synthetic(basis)
+                _reprice_holdings(book=book)
+                _book, _book_key = book, (mtime, basis)
+                print(f"[holdings] {len(book.portfolios)} portfolios, {len(book.symbols)} positions "
+                      f"loaded in {(time.time()-t0)*1000:.1f} ms")
+    _reprice_holdings()
+    return _book
+
+
+def _reprice_holdings(quotes=None, book=None):
+    """Realtime refresh listener: reprice the positions whose quote changed
+    since the book's last applied version."""
+    book = book or _book
+    if book is None:
+        return
+    version, changed, removed = rt.quotes_since(book.version)
+    if version != book.version:
+        book.apply_quotes(version, changed, removed)
+
+
+
+@app.route("/api/portfolio")
+def api_portfolio():
+    # ?portfolio=<id> selects one portfolio of a multi-portfolio holdings.csv
+    book = holdings_book()
+    if not book.portfolios:
+        return jsonify({"holdings": [], "totals": {}})
+    name = request.args.get("portfolio")
+    if name is None:
+        name = portfolio.DEFAULT_PORTFOLIO if portfolio.DEFAULT_PORTFOLIO in book.portfolios else book.portfolios[0]
+    totals = book.totals(name)
+    if totals is None:
+        return jsonify({"error": f"Unknown portfolio '{name}'"}), 404
+    totals["date"] = datetime.now().strftime("%d-%m-%Y")
+    return jsonify({"portfolio": name, "holdings": book.holdings(name), "totals": totals})
+
+
+@app.route("/api/portfolios/valuate", methods=["POST"])
+def api_portfolios_valuate():
+    """Value many portfolios in one call against one quote snapshot.
+    Body: JSON {"portfolios": [{"portfolio": id, "holdings": [{symbol,
+    quantity, avg_cost}]}]}, a CSV upload in the holdings.csv format
+    (multipart field "file"), or that CSV as a text/csv body.  Invalid
+    rows are skipped and listed under their portfolio's "errors", each
+    with its 1-based row (see portfolio.read_lots)."""
+    rejected = []
+    try:
+        if "file" in request.files:
+            lots = portfolio.read_lots(request.files["file"].stream, rejected)
+        elif request.mimetype == "text/csv":
+            lots = portfolio.read_lots(io.BytesIO(request.get_data()), rejected)
+        else:
+            payload = request.get_json(silent=True)
+            if payload is None:
+                return jsonify({"error": "Expected a JSON body or a CSV file"}), 400
+            lots = portfolio.lots_from_json(payload, rejected)
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    rt.get_all_quotes()                         # kicks a refresh if stale
+    version, quotes, _ = rt.quote_snapshot()
+    result = portfolio.valuate_batch(lots, quotes, portfolio_basis(), rejected)
+    return jsonify({
+        "date":          datetime.now().strftime("%d-%m-%Y"),
+        "quote_version": version,
+        "count":         len(result["portfolios"]),
+        "rejected_rows": len(rejected),
+        **result,
+    })
 
 
 # ===========================================================
@@ -315,42 +392,117 @@ def api_nifty_history():
 # ===========================================================
 #  DSFM TOP STOCKS  (Sharpe / Volatility)
 # ===========================================================
-def compute_risk_metrics():
-    """Sharpe / volatility for all 31 stocks using live yfinance data."""
-    trading_days = 252
-    results = []
-
+def _split_universe():
+    """(CSV-backed symbols, their matrix column indices, live-only symbols)."""
+    csv_syms, idx, live_syms = [], [], []
+    col_pos = {c: j for j, c in enumerate(PRICES.columns)}
     for sym in rt.SYMBOL_LIST:
+        col = PRICES.column_for(sym)
+        if col is not None:
+            csv_syms.append(sym)
+            idx.append(col_pos[col])
+        else:
+            live_syms.append(sym)
+    return csv_syms, idx, live_syms
+
+
+def compute_risk_metrics(lookback=None, risk_free_rate=0.0):
+    """Sharpe / volatility for every tracked stock.
+    CSV-backed symbols are scored in one vectorized pass over the shared price
+    matrix; only symbols missing from the CSV fall back to live history."""
+    csv_syms, idx, live_syms = _split_universe()
+
+    scored = []   # (symbol, metrics, column index)
+    if csv_syms:
+        m = risk.universe_risk_metrics(PRICES.matrix[:, idx], lookback=lookback,
+                                       risk_free_rate=risk_free_rate)
+        scored += [(sym, m, j) for j, sym in enumerate(csv_syms)]
+
+    for sym in live_syms:
         s = get_price_series(sym)
-        if s.empty or len(s) < 100:
-            continue
-        prices = s["Price"]
-        daily  = prices.pct_change().dropna()
-        if daily.empty:
+        if s.empty:
             continue
+        m = risk.universe_risk_metrics(s["Price"].to_numpy(dtype=float), lookback=lookback,
+                                       risk_free_rate=risk_free_rate)
+        scored.append((sym, m, 0))
 
-        mean_ret    = daily.mean()
-        vol         = daily.std()
-        annual_ret  = (1 + mean_ret) ** trading_days - 1
-        annual_vol  = vol * sqrt(trading_days)
-        sharpe      = (annual_ret / annual_vol) if annual_vol != 0 else 0
-        info        = rt.STOCKS.get(sym, {})
-
+    results = []
+    for sym, m, j in scored:
+        if not m["valid"][j]:
+            continue
+        info = rt.STOCKS.get(sym, {})
         results.append({
             "symbol":        sym,
             "name":          info.get("name", sym),
             "sector":        info.get("sector", ""),
-            "annual_return": round(annual_ret * 100, 2),
-            "volatility":    round(annual_vol * 100, 2),
-            "sharpe":        round(sharpe, 2),
+            "annual_return": round(float(m["annual_return"][j]) * 100, 2),
+            "volatility":    round(float(m["volatility"][j]) * 100, 2),
+            "sharpe":        round(float(m["sharpe"][j]), 2),
         })
 
     return sorted(results, key=lambda x: x["sharpe"], reverse=True)
 
 
+# Full-history ranking (the default view) is kept incrementally in memory:
+# seeded from the price matrix, then one O(1) update per symbol per new bar.
+RISK_CACHE = risk.RiskMetricsCache()
+_risk_seeded_for = None            # the PRICES matrix the cache was seeded from
+_risk_seed_lock = threading.Lock()
+
+
+def _ensure_risk_cache():
+    global _risk_seeded_for
+    matrix = PRICES.matrix
+    if _risk_seeded_for is matrix:
+        return
+    with _risk_seed_lock:
+        if _risk_seeded_for is matrix:
+            return
+        csv_syms, idx, live_syms = _split_universe()
+        if csv_syms:
+            last_day = PRICES.dates.max().strftime("%Y-%m-%d")
+            RISK_CACHE.seed(csv_syms, matrix[:, idx], last_day, info=rt.STOCKS)
+        for sym in live_syms:
+            s = get_price_series(sym)
+            if not s.empty:
+                RISK_CACHE.seed([sym], s["Price"].to_numpy(dtype=float),
+                                s["Date"].iloc[-1].strftime("%Y-%m-%d"), info=rt.STOCKS)
+        _risk_seeded_for = matrix
+    _on_quotes_refreshed(rt.get_all_quotes())
+
+
+def _on_quotes_refreshed(quotes):
+    """Realtime refresh listener: fold each live daily close into the cache."""
+    if _risk_seeded_for is None:
+        return          # not seeded yet — seeding replays the current quotes
+    for sym, q in quotes.items():
+        prev = q.get("prev_close")
+        if prev:
+            RISK_CACHE.update(sym, q.get("date"), q["ltp"] / prev - 1)
+
+
+
+def ranked_risk_metrics():
+    """Full-history Sharpe ranking, served from the incremental cache."""
+    _ensure_risk_cache()
+    return RISK_CACHE.ranked()
+
+
 @app.route("/api/dsfm/top-stocks")
 def api_dsfm_top_stocks():
-    metrics = compute_risk_metrics()
+    # ?lookback=<trading days>&rf=<annual risk-free rate, e.g. 0.065>
+    lookback = request.args.get("lookback", type=int)
+    rf       = request.args.get("rf", 0.0, type=float)
+    if "lookback" in request.args:
+        # a symbol needs MIN_OBSERVATIONS prices in the window to be ranked
+        shortest  = risk.MIN_OBSERVATIONS - 1
+        available = len(PRICES.dates) - 1           # daily returns in the price matrix
+        if lookback is None or not shortest <= lookback <= available:
+            return jsonify({"error": f"lookback must be an integer between {shortest} and {available} trading days"}), 400
+    if lookback is None and rf == 0.0:
+        metrics = ranked_risk_metrics()
+    else:
+        metrics = compute_risk_metrics(lookback=lookback, risk_free_rate=rf)
     return jsonify({
         "top_10": metrics[:10],
         "top_5": metrics[:5],
@@ -362,262 +514,134 @@ def api_dsfm_top_stocks():
 #  FORECAST MODELS (ARIMA, SARIMA, GARCH on log-returns)
 # ===========================================================
 
-# In-memory cache (process-level, survives within a server session)
-forecast_cache = {}
+FORECAST_STEPS      = 30        # default horizon (business days)
+MAX_FORECAST_STEPS  = 250
+FORECAST_CACHE_SIZE = int(os.environ.get("FORECAST_CACHE_SIZE", 256))
 
-# Lock to prevent duplicate simultaneous computation for the same symbol
-_compute_locks = {}
-_compute_locks_lock = threading.Lock()
+# In-memory cache (process-level): LRU-bounded, same TTL as the disk copy.
+# Keyed by (symbol, steps, model params) — see forecasting.forecast_key.
+forecast_cache = caching.TTLCache(maxsize=FORECAST_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
 
+# Model fits run in a process pool; one in-flight job per cache key
+FORECAST_JOBS = forecast_jobs.ForecastJobManager()
 
-def _cache_path(symbol):
-    safe = symbol.replace("/", "_").replace("\\", "_")
-    return os.path.join(CACHE_DIR, f"{safe}.json")
+# How long a blocking caller (decision endpoint, prewarm) waits for a fit
+FORECAST_WAIT_SECONDS = int(os.environ.get("FORECAST_WAIT_SECONDS", 120))
 
 
-def _load_disk_cache(symbol):
-    """Load forecast from disk if it exists and is fresh."""
-    path = _cache_path(symbol)
-    if not os.path.exists(path):
-        return None
-    try:
-        with open(path, "r") as f:
-            data = json.load(f)
-        ts = data.get("_cached_at", 0)
-        if time.time() - ts < CACHE_TTL_SECONDS:
-            return data
-    except Exception:
-        pass
-    return None
-
-
-def _save_disk_cache(symbol, result):
-    """Persist forecast result to disk with a timestamp."""
-    path = _cache_path(symbol)
-    try:
-        to_save = dict(result)
-        to_save["_cached_at"] = time.time()
-        with open(path, "w") as f:
-            json.dump(to_save, f)
-    except Exception as e:
-        print(f"[cache] Failed to save cache for {symbol}: {e}")
-
+def _forecast_inputs(symbol):
+    return forecast_service.forecast_inputs(symbol)
 
-def forecast_models(symbol, steps=30):
-    # 1. Check in-memory cache first (fastest)
-    if symbol in forecast_cache:
-        return forecast_cache[symbol]
 
-    # 2. Check disk cache
-    cached = _load_disk_cache(symbol)
+def _cached_forecast(symbol, steps=FORECAST_STEPS, inputs=None):
+    """Memory → disk cache lookup for the current input data (no fitting)."""
+    inputs = inputs or _forecast_inputs(symbol)
+    if inputs is None:
+        return None
+    key = forecasting.forecast_key(symbol, steps, inputs[2])
+    cached = forecast_cache.get(key)
     if cached:
-        forecast_cache[symbol] = cached
         return cached
+    cached, ts = forecast_service.load_cached(key)
+    if cached:
+        forecast_cache.set(key, cached, stored_at=ts)
+    return cached
 
-    # 3. Ensure only one thread computes for this symbol at a time
-    with _compute_locks_lock:
-        if symbol not in _compute_locks:
-            _compute_locks[symbol] = threading.Lock()
-        sym_lock = _compute_locks[symbol]
-
-    with sym_lock:
-        # Re-check after acquiring lock (another thread may have finished)
-        if symbol in forecast_cache:
-            return forecast_cache[symbol]
-        cached = _load_disk_cache(symbol)
-        if cached:
-            forecast_cache[symbol] = cached
-            return cached
-
-        return _run_forecast(symbol, steps)
-
-
-def _run_forecast(symbol, steps=30):
-    """
-    Trains ARIMA, SARIMA, and GARCH on the last 3 years of live daily data.
-    • ARIMA  → price-level forecast (auto_arima on prices, d=1)
-    • SARIMA → price-level forecast with weekly seasonality (m=5)
-    • GARCH  → volatility cone: predicts how much the price may swing
-               (upper/lower bands widen over time; center = last_price)
-    """
-    s = get_price_series(symbol)
-    if s.empty or len(s) < 50:
-        return None
-
-    prices    = s["Price"].values.astype(float)
-    dates     = s["Date"]
-    last_price = float(prices[-1])
-    last_date  = dates.iloc[-1]
-
-    # Use last 3 years (≈756 trading days) for speed + relevance
-    window = min(len(prices), 756)
-    prices  = prices[-window:]
-
-    # Log returns for GARCH
-    pct_ret = np.diff(prices) / prices[:-1] * 100   # percentage returns
-    log_ret = np.diff(np.log(prices))
-
-    if len(log_ret) < 30:
-        return None
-
-    future_dates = pd.bdate_range(start=last_date + timedelta(days=1), periods=steps)
 
-    print(f"[forecast] {symbol} — {len(prices)} obs, fitting ARIMA/SARIMA/GARCH...")
+def _warm_forecast_cache():
+    """Load the newest fresh forecasts for the current model params into memory."""
     t0 = time.time()
-
-    # ── ARIMA on price levels (d=1 handles non-stationarity) ────────────────
-    arima_prices = np.full(steps, last_price)
-    arima_lower  = np.full(steps, last_price)
-    arima_upper  = np.full(steps, last_price)
-    am = None
+    params = forecasting.model_params()
+    digest = forecast_store.store_key(("", 0, params, None)).rsplit("|", 1)[1]
+    loaded = 0
     try:
-        am = auto_arima(
-            prices, seasonal=False, stepwise=True,
-            suppress_warnings=True, error_action="ignore",
-            max_p=5, max_q=5, max_d=2, d=1,       # force at least d=1
-            information_criterion="aic", n_jobs=1,
-        )
-        fc = am.predict(n_periods=steps, return_conf_int=True, alpha=0.05)
-        arima_prices = fc[0]
-        arima_lower  = fc[1][:, 0]
-        arima_upper  = fc[1][:, 1]
-        print(f"[forecast]   ARIMA order={am.order} — terminal ₹{arima_prices[-1]:.2f}")
+        recent = forecast_service.store().recent(FORECAST_CACHE_SIZE, max_age=CACHE_TTL_SECONDS)
+        for skey, result, cached_at, fingerprint in recent:
+            symbol, steps, row_digest = skey.rsplit("|", 2)
+            if row_digest == digest:
+                forecast_cache.set((symbol, int(steps), params, fingerprint), result, stored_at=cached_at)
+                loaded += 1
     except Exception as e:
-        print(f"[forecast] ARIMA failed for {symbol}: {e}")
-
-    # ── SARIMA on price levels (d=1, m=5 weekly seasonality) ────────────────
-    # Uses statsmodels SARIMAX with forced seasonal component so it differs
-    # from plain ARIMA.  D=0 (no seasonal differencing) to avoid blowups.
-    sarima_prices = np.full(steps, last_price)
-    sarima_lower  = np.full(steps, last_price)
-    sarima_upper  = np.full(steps, last_price)
-    try:
-        from statsmodels.tsa.statespace.sarimax import SARIMAX
-        import warnings
-        warnings.filterwarnings("ignore")
-        base_order = am.order if am is not None else (1, 1, 0)
-        seasonal_order = (1, 0, 1, 5)   # P=1,D=0,Q=1,m=5 — lightweight
-        # Use only last 500 points to keep memory / time reasonable
-        sarima_window = min(len(prices), 500)
-        price_slice = prices[-sarima_window:]
-        smodel = SARIMAX(price_slice, order=base_order, seasonal_order=seasonal_order,
-                         enforce_stationarity=False, enforce_invertibility=False)
-        sfit   = smodel.fit(disp=False, maxiter=150)
-        sfc    = sfit.get_forecast(steps=steps)
-        sarima_prices = np.asarray(sfc.predicted_mean, dtype=float)
-        sci    = sfc.conf_int(alpha=0.05)
-        sci_arr = np.asarray(sci, dtype=float)
-        sarima_lower = sci_arr[:, 0]
-        sarima_upper = sci_arr[:, 1]
-        sarima_lower = np.maximum(sarima_lower, last_price * 0.5)
-        print(f"[forecast]   SARIMA order={base_order} seasonal={seasonal_order} — terminal ₹{float(sarima_prices[-1]):.2f}")
-    except Exception as e:
-        print(f"[forecast] SARIMA failed for {symbol}: {e}")
-        # Fallback: copy ARIMA but add small offset so it's not identical
-        try:
-            noise = np.linspace(0, last_price * 0.005, steps)
-            sarima_prices = arima_prices + noise
-            sarima_lower  = arima_lower - abs(noise) * 2
-            sarima_upper  = arima_upper + abs(noise) * 2
-        except Exception:
-            pass
-
-    # ── GARCH(1,1) — Price Prediction via Monte Carlo Simulation ──────────
-    # Fit GARCH on % returns, forecast daily variance, then simulate N price
-    # paths using the mean return + GARCH volatility.  The median path is the
-    # prediction line; 5th/95th percentile paths give confidence bands.
-    garch_prices = np.full(steps, last_price)
-    garch_lower  = np.full(steps, last_price)
-    garch_upper  = np.full(steps, last_price)
+        print(f"[cache] Warm-up from {forecast_service.FORECAST_DB} failed: {e}")
+    print(f"[cache] Loaded {loaded} cached forecasts in {(time.time()-t0)*1000:.1f} ms")
+
+
+def store_forecast(key, result, warm=None):
+    """Cache a finished fit in memory + on disk and keep its model state
+    for the next warm start.  `warm` is the state the fit started from."""
+    if not result:
+        return
+    forecast_service.save_forecast(key, result, warm)
+    forecast_cache.set(key, result)
+
+
+def submit_forecast(symbol, steps=FORECAST_STEPS, mode=None, inputs=None):
+    """Queue a forecast fit for symbol (or join the one already running).
+    Returns the job, or None when there is not enough price history.
+    In parallel/eager mode the models are fitted in separate workers."""
+    mode = mode or forecasting.FORECAST_MODE
+    inputs = inputs or _forecast_inputs(symbol)
+    if inputs is None:
+        return None
+    prices, last_date, fingerprint = inputs
+    key = forecasting.forecast_key(symbol, steps, fingerprint, mode)
+    warm = forecast_service.model_state(symbol)
+
+    def _store(result):
+        store_forecast(key, result, warm)
+
+    if mode == "sequential":
+        return FORECAST_JOBS.submit(key, forecasting.run_forecast,
+                                    symbol, prices, last_date, steps, on_done=_store, warm=warm)
+
+    # Only the last HISTORY_WINDOW closes are fitted — don't pickle the rest
+    window = prices[-forecasting.HISTORY_WINDOW:]
+    submitted = time.time()
+
+    def _combine(parts):
+        fits = {}
+        for part in parts.values():
+            fits.update(part)
+        print(f"[forecast] {symbol} done in {time.time()-submitted:.1f}s ({mode})")
+        return forecasting.assemble_forecast(prices, last_date, steps,
+                                             fits.get("arima"), fits.get("sarima"), fits.get("garch"),
+                                             mode=mode, elapsed=time.time() - submitted)
+
+    return FORECAST_JOBS.submit_group(key,
+                                      forecasting.forecast_parts(symbol, window, steps, mode, warm),
+                                      _combine, on_done=_store)
+
+
+def forecast_models(symbol, steps=FORECAST_STEPS, wait=True):
+    """Cached forecast for symbol, fitting it in the worker pool on a miss.
+    With wait=False a miss returns None immediately (the job keeps running)."""
+    inputs = _forecast_inputs(symbol)
+    if inputs is None:
+        return None
+    cached = _cached_forecast(symbol, steps, inputs)
+    if cached:
+        return cached
+
+    job = submit_forecast(symbol, steps, inputs=inputs)
+    if job is None or not wait:
+        return None
     try:
-        gm = arch_model(pct_ret, vol="Garch", p=1, q=1,
-                         mean="Constant", dist="normal")
-        gf = gm.fit(disp="off", options={"maxiter": 300})
-
-        # Extract fitted mean return (daily %) and variance forecast
-        mu = float(gf.params.get("mu", pct_ret.mean()))  # daily mean return %
-        variance_fc = gf.forecast(horizon=steps, reindex=False)
-        daily_var = variance_fc.variance.values[-1]       # array len=steps
-
-        # Monte Carlo: simulate N paths
-        N_PATHS = 500
-        np.random.seed(42)  # reproducible
-        sim_paths = np.zeros((N_PATHS, steps))
-        for i in range(N_PATHS):
-            price = last_price
-            path  = np.zeros(steps)
-            for t in range(steps):
-                sigma = np.sqrt(max(daily_var[t], 0.0)) / 100.0  # decimal
-                shock = np.random.normal(0, sigma)
-                ret   = mu / 100.0 + shock                       # daily return
-                price = price * (1 + ret)
-                path[t] = price
-            sim_paths[i] = path
-
-        garch_prices = np.median(sim_paths, axis=0)
-        garch_lower  = np.percentile(sim_paths, 5,  axis=0)
-        garch_upper  = np.percentile(sim_paths, 95, axis=0)
-        garch_lower  = np.maximum(garch_lower, last_price * 0.3)
-        print(f"[forecast]   GARCH(1,1) — terminal ₹{garch_prices[-1]:.2f}  band: ₹{garch_lower[-1]:.0f} – ₹{garch_upper[-1]:.0f}")
+        return job.result(timeout=FORECAST_WAIT_SECONDS)   # after store_forecast finished it
     except Exception as e:
-        print(f"[forecast] GARCH failed for {symbol}: {e}")
-
-    print(f"[forecast] {symbol} done in {time.time()-t0:.1f}s")
-
-    # Direction = ARIMA terminal price vs current
-    direction = "UP" if float(arima_prices[-1]) > last_price else "DOWN"
-
-    # Convert all forecast arrays to plain numpy arrays for serialization
-    def _as_array(x):
-        if hasattr(x, 'values'):
-            return np.array(x.values, dtype=float)
-        return np.array(x, dtype=float)
-
-    arima_prices  = _as_array(arima_prices)
-    arima_lower   = _as_array(arima_lower)
-    arima_upper   = _as_array(arima_upper)
-    sarima_prices = _as_array(sarima_prices)
-    sarima_lower  = _as_array(sarima_lower)
-    sarima_upper  = _as_array(sarima_upper)
-    garch_prices  = _as_array(garch_prices)
-    garch_lower   = _as_array(garch_lower)
-    garch_upper   = _as_array(garch_upper)
-
-    def to_series(vals, lower, upper, dates):
-        return [
-            {
-                "date":  d.strftime("%Y-%m-%d"),
-                "price": round(float(p), 2),
-                "lower": round(float(l), 2),
-                "upper": round(float(u), 2),
-            }
-            for d, p, l, u in zip(dates, vals, lower, upper)
-        ]
-
-    result = {
-        "arima":     to_series(arima_prices,  arima_lower,  arima_upper,  future_dates),
-        "sarima":    to_series(sarima_prices, sarima_lower, sarima_upper, future_dates),
-        "garch":     to_series(garch_prices,  garch_lower,  garch_upper,  future_dates),
-        "direction": direction,
-        "last_price": last_price,
-        "symbol_clean": rt.resolve(symbol) or symbol,
-        "display_name": rt.get_display_name(symbol),
-    }
+        print(f"[forecast] {symbol} not ready: {e}")
+        return None
 
-    forecast_cache[symbol] = result
-    _save_disk_cache(symbol, result)
-    return result
 
 
 def _prewarm_top_stocks():
     """Background thread: pre-compute forecasts for top stocks at startup."""
     time.sleep(2)  # slight delay to let Flask finish starting
     try:
-        metrics = compute_risk_metrics()
+        metrics = ranked_risk_metrics()
         top_symbols = [m["symbol"] for m in metrics[:5]]
         print(f"[prewarm] Pre-warming forecasts for: {top_symbols}")
         for sym in top_symbols:
-            if sym not in forecast_cache and _load_disk_cache(sym) is None:
+            if _cached_forecast(sym) is None:
                 try:
                     forecast_models(sym)
                 except Exception as e:
@@ -629,11 +653,34 @@ def _prewarm_top_stocks():
 
 
 
+def _requested_steps() -> int:
+    """?steps=<n> clamped to 1..MAX_FORECAST_STEPS (default FORECAST_STEPS) —
+    shared by the forecast and status endpoints so their job keys match."""
+    steps = request.args.get("steps", FORECAST_STEPS, type=int)
+    return max(1, min(steps, MAX_FORECAST_STEPS))
+
+
 @app.route("/api/dsfm/forecast/<symbol>")
 def api_dsfm_forecast(symbol):
-    forecast = forecast_models(symbol)
-    if not forecast:
+    """Cached forecast, or 202 + job id while the fit runs (?wait=true blocks).
+    ?steps=<n> picks the horizon (default 30 business days)."""
+    steps = _requested_steps()
+    inputs = _forecast_inputs(symbol)
+    if inputs is None:
         return jsonify({"error": "No forecast"}), 404
+    forecast = _cached_forecast(symbol, steps, inputs)
+    if not forecast:
+        try:
+            job = submit_forecast(symbol, steps, inputs=inputs)
+        except forecast_jobs.JobQueueFull as e:
+            return jsonify({"error": str(e)}), 503
+        if job is None:
+            return jsonify({"error": "No forecast"}), 404
+        if request.args.get("wait", "false").lower() != "true":
+            return jsonify({"symbol": symbol, **job.to_dict()}), 202
+        forecast = forecast_models(symbol, steps)
+        if not forecast:
+            return jsonify({"symbol": symbol, **job.to_dict()}), 202
 
     return jsonify({
         "symbol": symbol,
@@ -641,95 +688,45 @@ def api_dsfm_forecast(symbol):
         "forecast_arima": forecast["arima"],
         "forecast_sarima": forecast["sarima"],
         "forecast_garch": forecast["garch"],
+        "meta": forecast.get("meta"),
     })
 
 
 @app.route("/api/dsfm/forecast-status/<symbol>")
 def api_dsfm_forecast_status(symbol):
-    """Quick check — returns whether a cached forecast exists (no computation)."""
-    if symbol in forecast_cache:
-        return jsonify({"cached": True, "source": "memory"})
-    if _load_disk_cache(symbol) is not None:
-        return jsonify({"cached": True, "source": "disk"})
-    return jsonify({"cached": False})
+    """Quick check — cache state plus queued / running / done job progress
+    (no computation).  `status` is always the latest job's own state — the
+    forecast can be cached (e.g. by the nightly batch, or just stored by a
+    job that is still finishing) while that job is running or has failed."""
+    steps = _requested_steps()
+    inputs = _forecast_inputs(symbol)
+    if inputs is None:
+        return jsonify({"cached": False})
+    key = forecasting.forecast_key(symbol, steps, inputs[2])
+    job = FORECAST_JOBS.latest(key)
+    job_info = job.to_dict() if job else {}
+    if key in forecast_cache:
+        return jsonify({"cached": True, "source": "memory", **job_info})
+    if forecast_service.cache_fresh(key):
+        return jsonify({"cached": True, "source": "disk", **job_info})
+    return jsonify({"cached": False, **job_info})
+
+
+@app.route("/api/dsfm/cache-stats")
+def api_dsfm_cache_stats():
+    """Forecast and sentiment cache counters (hits / misses / evictions ...)."""
+    return jsonify({
+        "forecast_cache":  forecast_cache.stats(),
+        "sentiment_cache": sentiment.cache_stats(),
+        "polarity_cache":  sentiment.polarity_stats(),
+    })
 
 
 # ===========================================================
-#  SENTIMENT (newsdata.io + TextBlob)
+#  SENTIMENT (newsdata.io + TextBlob, cached — see sentiment.py)
 # ===========================================================
-load_dotenv()
-NEWS_API_KEY = os.getenv("NEWSCATCHER_API_KEY")  # make sure .env has this
-
-
 def get_dynamic_sentiment(symbol):
-    clean_symbol = rt.resolve(symbol) or symbol.split("_")[-1].upper()
-    # Use the full display name for better news results
-    keyword = rt.get_display_name(clean_symbol)
-    if keyword == clean_symbol:
-        keyword = SYMBOL_MAP.get(clean_symbol, clean_symbol)
-
-    url = "https://newsdata.io/api/1/news"
-    params = {
-        "apikey": NEWS_API_KEY,
-        "q": keyword,
-        "language": "en",
-        "country": "in",
-    }
-
-    try:
-        res = requests.get(url, params=params, timeout=10)
-        data = res.json()
-
-        if "results" not in data or len(data["results"]) == 0:
-            return {
-                "symbol": symbol,
-                "score": 0.0,
-                "label": "NEUTRAL",
-                "news": []
-            }
-
-        sentiments = []
-        news_list = []
-
-        for article in data["results"]:
-            title = article.get("title", "")
-            desc = article.get("description", "") or ""
-            published = article.get("pubDate", "")
-
-            text = f"{title} {desc}"
-            polarity = TextBlob(text).sentiment.polarity
-            sentiments.append(polarity)
-
-            news_list.append({
-                "title": title,
-                "description": desc,
-                "published": published,
-                "sentiment_score": round(polarity, 3)
-            })
-
-        score = sum(sentiments) / len(sentiments) if sentiments else 0.0
-        if score > 0.1:
-            label = "POSITIVE"
-        elif score < -0.1:
-            label = "NEGATIVE"
-        else:
-            label = "NEUTRAL"
-
-        return {
-            "symbol": symbol,
-            "score": round(score, 3),
-            "label": label,
-            "news": news_list
-        }
-
-    except Exception as e:
-        print("Sentiment Error:", e)
-        return {
-            "symbol": symbol,
-            "score": 0.0,
-            "label": "NEUTRAL",
-            "news": []
-        }
+    return sentiment.get_sentiment(symbol)
 
 
 @app.route("/api/dsfm/sentiment/<symbol>")
@@ -742,32 +739,21 @@ def api_dsfm_sentiment(symbol):
 # ===========================================================
 @app.route("/api/most-bought")
 def api_most_bought():
-    quotes = rt.get_all_quotes()
+    body = VIEWS.get("most_bought")
+    if body is not None:
+        return app.response_class(body, mimetype="application/json")
+
+    # No live quotes yet → fall back to CSV
     changes = []
-    for sym, info in rt.STOCKS.items():
-        q = quotes.get(sym)
-        if not q:
+    df = read_timeseries()
+    if df.empty:
+        return jsonify({"most_bought": None})
+    last, prev, date = latest_and_prev_prices(df)
+    for sym in last.index:
+        if pd.isna(last[sym]) or pd.isna(prev[sym]):
             continue
-        changes.append({
-            "symbol":     sym,
-            "name":       info["name"],
-            "sector":     info["sector"],
-            "ltp":        q["ltp"],
-            "pct_change": q["change_pct"],
-            "volume":     q.get("volume", 0),
-        })
-
-    if not changes:
-        # Fallback CSV
-        df = read_timeseries()
-        if df.empty:
-            return jsonify({"most_bought": None})
-        last, prev, date = latest_and_prev_prices(df)
-        for sym in last.index:
-            if pd.isna(last[sym]) or pd.isna(prev[sym]):
-                continue
-            pct = (last[sym] - prev[sym]) / prev[sym] * 100
-            changes.append({"symbol": sym, "name": sym, "ltp": float(last[sym]), "pct_change": round(pct, 2), "volume": 0})
+        pct = (last[sym] - prev[sym]) / prev[sym] * 100
+        changes.append({"symbol": sym, "name": sym, "ltp": float(last[sym]), "pct_change": round(pct, 2), "volume": 0})
 
     if not changes:
         return jsonify({"most_bought": None})
@@ -791,130 +777,103 @@ def api_most_bought():
         "pct_change": most_bought["pct_change"],
         "volume":     int(most_bought.get("volume", 0)),
         "top_stocks": top8,
-        "source":     "live",
+        "source":     "csv",
     })
 
 
-# ========= helpers for market insights =========
-# (kept for potential CSV fallback usage)
-def _pct_change_over_days(df: pd.DataFrame, sym: str, days: int):
-    series = pd.to_numeric(df[sym], errors="coerce").dropna()
-    if len(series) <= days:
-        return None
-
-    latest = series.iloc[-1]
-    past = series.iloc[-(days + 1)]
-    if past == 0 or pd.isna(latest) or pd.isna(past):
-        return None
-
-    return float((latest - past) / past * 100.0)
-
-
 @app.route("/api/market-insights")
 def api_market_insights():
-    quotes = rt.get_all_quotes()
+    return app.response_class(VIEWS.get("market_insights"), mimetype="application/json")
 
-    advancers = decliners = unchanged = 0
-    breadth_rows = []
-    sector_stats = {}
-    momentum_rows = []
 
-    for sym, info in rt.STOCKS.items():
-        q = quotes.get(sym)
-        if not q:
-            continue
-        pct = q["change_pct"]
-        sector = info.get("sector", "Other")
+# ===========================================================
+#  FINAL DECISION ENGINE (history + ARIMA/SARIMA/GARCH + sentiment)
+# ===========================================================
+# The forecast, the news sentiment and the price history are fetched
+# concurrently; the endpoint answers once all three are in or the latency
+# budget runs out, listing whatever is still outstanding under "pending".
+DECISION_BUDGET_SECONDS = float(os.environ.get("DECISION_BUDGET_SECONDS", FORECAST_WAIT_SECONDS))
+DECISION_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get("DECISION_WORKERS", 8)),
+                                   thread_name_prefix="decision")
 
-        if pct > 0:
-            advancers += 1
-        elif pct < 0:
-            decliners += 1
-        else:
-            unchanged += 1
-
-        breadth_rows.append({"symbol": sym, "name": info["name"], "pct_change": pct})
-
-        if sector not in sector_stats:
-            sector_stats[sector] = {"sector": sector, "advancers": 0, "decliners": 0, "unchanged": 0, "sum_pct": 0.0, "count": 0}
-        ss = sector_stats[sector]
-        if pct > 0:   ss["advancers"] += 1
-        elif pct < 0: ss["decliners"] += 1
-        else:         ss["unchanged"] += 1
-        ss["sum_pct"] += pct
-        ss["count"]   += 1
-
-    adv_decl_ratio = (advancers / decliners) if decliners != 0 else None
-
-    sectors = []
-    for sec, ss in sector_stats.items():
-        avg_move = ss["sum_pct"] / ss["count"] if ss["count"] > 0 else 0.0
-        sectors.append({
-            "sector":    sec,
-            "advancers": ss["advancers"],
-            "decliners": ss["decliners"],
-            "unchanged": ss["unchanged"],
-            "avg_move":  round(avg_move, 2),
-        })
+NEUTRAL_SENTIMENT = {"score": 0.0, "label": "NEUTRAL", "news": []}
 
-    # Momentum: compute from cached quotes (daily change as proxy) — no extra download
-    # This avoids a second slow yf.download call
-    try:
-        for sym, info in rt.STOCKS.items():
-            q = quotes.get(sym)
-            if not q:
-                continue
-            pct_1d = q["change_pct"]
-            # Use 1-day change as approximate momentum (real 5d/20d would need history)
-            momentum_rows.append({
-                "symbol":          sym,
-                "name":            info["name"],
-                "pct_5d":          round(pct_1d, 2),
-                "pct_20d":         round(pct_1d, 2),
-                "momentum_score":  round(pct_1d * 3, 2),  # simplified score
-            })
-    except Exception as e:
-        print(f"[insights] Momentum computation failed: {e}")
 
-    momentum_rows = sorted(momentum_rows, key=lambda x: x["momentum_score"], reverse=True)[:10]
+def _decision_history(clean):
+    """History (last 800 trading days) as [{date, price}]; [] for a symbol
+    with no prices."""
+    history_df = get_price_series(clean).tail(800)
+    if history_df.empty:
+        return []
+    return [
+        {"date": d.strftime("%Y-%m-%d"), "price": round(float(p), 2)}
+        for d, p in zip(history_df["Date"], history_df["Price"])
+    ]
 
-    return jsonify({
-        "date": datetime.now().strftime("%d-%m-%Y"),
-        "breadth": {
-            "advancers":     advancers,
-            "decliners":     decliners,
-            "unchanged":     unchanged,
-            "adv_decl_ratio": round(adv_decl_ratio, 2) if adv_decl_ratio else None,
-        },
-        "sectors":  sectors,
-        "momentum": momentum_rows,
-    })
+
+def gather_decision_inputs(clean, budget=DECISION_BUDGET_SECONDS) -> tuple:
+    """Run the three component fetches concurrently →
+    ({name: result}, pending, {name: exception}).  Components not finished
+    within `budget` seconds keep running in the background and are left out
+    of the results; a component that raised is reported under errors
+    instead, so one failure doesn't take down the others."""
+    futures = {
+        "forecast":  DECISION_POOL.submit(forecast_models, clean),
+        "sentiment": DECISION_POOL.submit(get_dynamic_sentiment, clean),
+        "history":   DECISION_POOL.submit(_decision_history, clean),
+    }
+    wait(futures.values(), timeout=budget)
+    results, errors = {}, {}
+    for name, f in futures.items():
+        if not f.done():
+            continue
+        try:
+            results[name] = f.result()
+        except Exception as e:
+            print(f"[decision] {name} failed for {clean}: {e}")
+            errors[name] = e
+    pending = [name for name, f in futures.items() if not f.done()]
+    return results, pending, errors
 
 
-# ===========================================================
-#  FINAL DECISION ENGINE (history + ARIMA/SARIMA/GARCH + sentiment)
-# ===========================================================
 @app.route("/api/dsfm/decision/<symbol>")
 def api_dsfm_decision(symbol):
+    """?budget=<seconds> caps how long to wait for slow components."""
     # Resolve to clean symbol
     clean = rt.resolve(symbol) or symbol
-
-    forecast = forecast_models(clean)
+    budget = request.args.get("budget", DECISION_BUDGET_SECONDS, type=float)
+
+    results, pending, errors = gather_decision_inputs(clean, budget)
+    if "history" in results and not results["history"]:
+        return jsonify({"error": f"No price history for {symbol}"}), 404
+    if isinstance(errors.get("forecast"), forecast_jobs.JobQueueFull):
+        return jsonify({"error": str(errors["forecast"])}), 503
+    if "forecast" in errors:
+        return jsonify({"error": f"Forecast failed: {errors['forecast']}"}), 503
+
+    sentiment = results.get("sentiment", NEUTRAL_SENTIMENT)   # failed → neutral
+    history   = results.get("history", [])
+    if "forecast" in pending:
+        # Still fitting — poll /api/dsfm/forecast-status and ask again
+        return jsonify({
+            "symbol":          clean,
+            "display_name":    rt.get_display_name(clean),
+            "signal":          "PENDING",
+            "sentiment_label": sentiment["label"],
+            "sentiment_score": sentiment["score"],
+            "news":            sentiment.get("news", []),
+            "history":         history,
+            "pending":         pending,
+        }), 202
+
+    forecast = results["forecast"]
     if not forecast:
         return jsonify({"error": "No forecast available. Model training may still be running."}), 404
 
-    sentiment = get_dynamic_sentiment(clean)
     s_label   = sentiment["label"]
     direction = forecast["direction"]
     last_price = forecast.get("last_price", 0)
 
-    # History (last 800 trading days from live data)
-    history_df = get_price_series(clean).tail(800)
-    history = [
-        {"date": d.strftime("%Y-%m-%d"), "price": round(float(p), 2)}
-        for d, p in zip(history_df["Date"], history_df["Price"])
-    ]
-
     # Signal logic (ARIMA direction + sentiment)
     if direction == "UP"   and s_label == "POSITIVE":  signal = "BUY"
     elif direction == "UP" and s_label == "NEGATIVE":  signal = "WAIT"
@@ -941,7 +900,9 @@ def api_dsfm_decision(symbol):
         "forecast_arima":   forecast["arima"],
         "forecast_sarima":  forecast["sarima"],
         "forecast_garch":   forecast["garch"],
+        "forecast_meta":    forecast.get("meta"),
         "history":          history,
+        "pending":          pending,      # e.g. ["sentiment"] → neutral stand-in
     })
 
 
@@ -950,15 +911,69 @@ def api_dsfm_decision(symbol):
 # ===========================================================
 @app.route("/api/live/quotes")
 def api_live_quotes():
-    """Returns live price, change, %, open, high, low, volume for all stocks."""
+    """Returns live price, change, %, open, high, low, volume for all stocks.
+    Each response carries the quote-cache version as its ETag (a matching
+    If-None-Match gives 304), and ?since=<version> returns only the symbols
+    that changed after that version."""
     force = request.args.get("refresh", "false").lower() == "true"
-    quotes = rt.get_all_quotes(force_refresh=force)
-    result = list(quotes.values())  # each item already has symbol, name, sector, etc.
-    return jsonify({
-        "count":      len(result),
-        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "stocks":     result,
-    })
+    rt.get_all_quotes(force_refresh=force)      # kicks a refresh when stale
+    since = request.args.get("since", type=int)
+    version, quotes, ts = rt.quote_snapshot()
+
+    if since is not None and 0 <= since <= version:
+        _, changed, removed = rt.quotes_since(since)
+        resp = jsonify({
+            "version":    version,
+            "since":      since,
+            "count":      len(changed),
+            "updated_at": _quote_stamp(ts),
+            "stocks":     list(changed.values()),
+            "removed":    removed,
+        })
+        resp.set_etag(f"quotes-{version}-since-{since}")
+    else:
+        # since from before a server restart (> version) → full snapshot
+        resp = app.response_class(_quotes_body(version, quotes, ts), mimetype="application/json")
+        resp.set_etag(f"quotes-{version}")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+
+_quotes_bodies = caching.TTLCache(maxsize=4)    # version -> serialized full response
+
+
+def _quote_stamp(ts) -> str:
+    """Time of the quote refresh; the current time before the first one,
+    as the response always carried a timestamp."""
+    return (datetime.fromtimestamp(ts) if ts else datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _quotes_body(version, quotes, ts) -> bytes:
+    """Full /api/live/quotes body, serialized once per cache version."""
+    body = _quotes_bodies.get(version)
+    if body is None:
+        result = list(quotes.values())  # each item already has symbol, name, sector, etc.
+        body = json_body({
+            "version":    version,
+            "count":      len(result),
+            "updated_at": _quote_stamp(ts),
+            "stocks":     result,
+        })
+        if ts:                          # no refresh yet → stamped now, so not reusable
+            _quotes_bodies.set(version, body)
+    return body
+
+
+@app.route("/api/live/stream")
+def api_live_stream():
+    """Server-Sent Events: a `snapshot` event with every quote on connect,
+    then `quotes` events with only the changed symbols after each refresh.
+    Event ids are quote-cache versions; a reconnect with Last-Event-ID
+    resumes with the changes since that version."""
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    return Response(stream_with_context(live_stream.BROADCASTER.stream(last_id)),
+                     mimetype="text/event-stream",
+                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.route("/api/live/intraday/<symbol>")
@@ -984,6 +999,33 @@ def api_live_history(symbol):
 # ===========================================================
 #  RUN SERVER
 # ===========================================================
+# ===========================================================
+#  PROCESS SETUP
+# ===========================================================
+_initialized = False
+
+
+def init_app():
+    """Per-process setup: load the freshest forecasts into memory and
+    register the quote-refresh listeners (folded in this order: rolling
+    closes before the views that read them).  Runs once."""
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+    _warm_forecast_cache()
+    for listener in (_fold_closes, VIEWS.refresh, _reprice_holdings, _on_quotes_refreshed):
+        rt.add_refresh_listener(listener)
+
+
+# Forecast workers are spawned processes, and spawn re-imports the main
+# script (`python app.py`) in each of them as __mp_main__ — they only need
+# forecasting.py, so they skip the setup.  Imported as a module (gunicorn
+# app:app, a test client) or run directly, the process sets itself up.
+if __name__ != "__mp_main__":
+    init_app()
+
+
 if __name__ == "__main__":
     # Pre-warm live quotes in background
     threading.Thread(target=rt.warmup, daemon=True).start()
@@ -0,0 +1,155 @@
+# backend/batch_forecast.py
+"""
+Nightly batch: forecast every symbol in rt.STOCKS into the forecast cache.
+
+    python -m batch_forecast [--steps 30] [--workers N] [--timeout 300]
+                             [--force] [SYMBOL ...]
+
+Run it from cron before market open so no request ever hits a cold fit.
+Symbols are fitted one per worker process; a fit that runs longer than
+--timeout seconds is abandoned and counted as a failure.  SIGALRM stops a
+slow fit inside its worker; a fit stuck in C code ignores it, so the
+parent also gives the whole run a deadline (--timeout per round of
+--workers fits) and kills the pool when it passes.  Symbols whose
+cached forecast already matches today's data are skipped unless --force.
+Prints throughput (symbols/s), p50/p95 fit time and the failures at the end.
+"""
+
+import argparse
+import multiprocessing
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+
+import numpy as np
+
+import forecast_jobs
+import forecast_service
+import forecasting
+import realtime as rt
+
+DEFAULT_TIMEOUT = 300       # seconds per symbol
+DEADLINE_GRACE  = 30        # parent-side slack on top of the per-fit timeouts
+
+
+class FitTimeout(BaseException):
+    """BaseException so the per-model `except Exception` fallbacks in
+    forecasting.py cannot swallow it."""
+
+
+def _alarm(signum, frame):
+    raise FitTimeout()
+
+
+def fit_symbol(symbol, prices, last_date, steps, mode, warm, timeout):
+    """Worker entry point → (result, fit seconds).  The timeout is enforced
+    with SIGALRM inside the worker, so a stuck fit frees its process."""
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    t0 = time.perf_counter()
+    try:
+        if mode != "sequential":
+            # same fits as the app's parallel / eager jobs, run back to back
+            # here, so the result's meta.mode matches its cache key
+            fits = {}
+            for fn, args in forecasting.forecast_parts(symbol, prices, steps, mode, warm).values():
+                fits.update(fn(*args))
+            result = forecasting.assemble_forecast(prices, last_date, steps, fits.get("arima"),
+                                                   fits.get("sarima"), fits.get("garch"),
+                                                   mode=mode, elapsed=time.perf_counter() - t0)
+        else:
+            result = forecasting.run_forecast(symbol, prices, last_date, steps, warm=warm)
+    except FitTimeout:
+        raise TimeoutError(f"fit exceeded {timeout}s") from None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return result, time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast every tracked symbol into the cache.")
+    parser.add_argument("symbols", nargs="*", help="symbols to fit (default: all of rt.STOCKS)")
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: FORECAST_WORKERS)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per symbol")
+    parser.add_argument("--force", action="store_true", help="refit even if the cache is fresh")
+    args = parser.parse_args(argv)
+
+    symbols = args.symbols or rt.SYMBOL_LIST
+    workers = args.workers or forecast_jobs.FORECAST_WORKERS
+    mode = forecasting.FORECAST_MODE
+
+    jobs, skipped = {}, []
+    for sym in symbols:
+        inputs = forecast_service.forecast_inputs(sym)
+        if inputs is None:
+            skipped.append((sym, "not enough history"))
+            continue
+        key = forecasting.forecast_key(sym, args.steps, inputs[2], mode)
+        if not args.force and forecast_service.cache_fresh(key):
+            skipped.append((sym, "cached"))
+            continue
+        jobs[sym] = (key, inputs)
+
+    print(f"[batch] {len(jobs)} symbols to fit, {len(skipped)} skipped, "
+          f"{workers} workers, steps={args.steps}, mode={mode}")
+
+    fit_times, failures = [], []
+    t0 = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    futures = {}
+    for sym, (key, (prices, last_date, _)) in jobs.items():
+        warm = forecast_service.model_state(sym)
+        window = prices[-forecasting.HISTORY_WINDOW:]
+        fut = pool.submit(fit_symbol, sym, window, last_date, args.steps, mode, warm, args.timeout)
+        futures[fut] = (sym, key, warm)
+
+    rounds = -(-len(futures) // workers)
+    deadline = args.timeout * rounds + DEADLINE_GRACE if args.timeout else None
+    try:
+        for fut in as_completed(futures, timeout=deadline):
+            sym, key, warm = futures[fut]
+            try:
+                result, seconds = fut.result()
+            except Exception as e:
+                failures.append((sym, str(e) or type(e).__name__))
+                print(f"[batch] {sym} failed: {e}")
+                continue
+            if not result:
+                failures.append((sym, "no forecast"))
+                continue
+            forecast_service.save_forecast(key, result, warm)
+            fit_times.append(seconds)
+            print(f"[batch] {sym} done in {seconds:.2f}s")
+    except FuturesTimeout:
+        hung = [sym for fut, (sym, _, _) in futures.items() if not fut.done()]
+        print(f"[batch] Deadline of {deadline:.0f}s passed — killing the pool ({len(hung)} unfinished)")
+        failures.extend((sym, f"no result within the {deadline:.0f}s deadline") for sym in hung)
+        for proc in list(pool._processes.values()):
+            proc.kill()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - t0
+    done = len(fit_times)
+    print(f"\n[batch] {done}/{len(jobs)} fitted in {elapsed:.1f}s "
+          f"({done / elapsed if elapsed else 0:.2f} symbols/s)")
+    if fit_times:
+        p50, p95 = np.percentile(fit_times, [50, 95])
+        print(f"[batch] fit time p50 {p50:.2f}s  p95 {p95:.2f}s  max {max(fit_times):.2f}s")
+    for sym, reason in skipped:
+        if reason != "cached":
+            print(f"[batch] skipped {sym}: {reason}")
+    for sym, reason in failures:
+        print(f"[batch] FAILED {sym}: {reason}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
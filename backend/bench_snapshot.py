@@ -0,0 +1,90 @@
+# backend/bench_snapshot.py
+"""
+Benchmark: text-parsed CSV vs memory-mapped snapshot.
+
+    python bench_snapshot.py [--iterations 200]
+
+Cold start  = time until the full price matrix is usable in a fresh store.
+Per request = time to obtain one symbol's Date + Price series, i.e. what
+              get_price_series() pays on every call.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from price_store import PriceStore
+
+
+def read_timeseries_csv(path):
+    """The original per-request path: parse the whole CSV every time."""
+    df = pd.read_csv(path)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(how="all", subset=[c for c in df.columns if c != "Date"])
+    df = df.sort_values("Date").reset_index(drop=True)
+    return df.ffill().bfill()
+
+
+def _timeit(fn, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _fmt(samples):
+    ms = [s * 1000 for s in samples]
+    p95 = np.percentile(ms, 95) if len(ms) > 1 else ms[0]
+    return f"median {statistics.median(ms):9.3f} ms   p95 {p95:9.3f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=snapshot.DATA_CSV)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as snap_dir:
+        snapshot.compile_snapshot(args.csv, snap_dir)
+        col = snapshot.read_meta(snap_dir)["columns"][0]
+        cold_n = max(args.iterations // 10, 5)
+
+        print(f"CSV: {args.csv}  ({os.path.getsize(args.csv) / 1e6:.2f} MB)")
+        print(f"Iterations: {args.iterations}  (cold start: {cold_n})\n")
+
+        def cold_csv():
+            PriceStore(args.csv).matrix
+
+        def cold_snapshot():
+            PriceStore(args.csv, snapshot_dir=snap_dir).matrix
+
+        print("Cold start")
+        print(f"  read_timeseries()   {_fmt(_timeit(lambda: read_timeseries_csv(args.csv), cold_n))}")
+        print(f"  PriceStore (CSV)    {_fmt(_timeit(cold_csv, cold_n))}")
+        print(f"  PriceStore (mmap)   {_fmt(_timeit(cold_snapshot, cold_n))}")
+
+        def per_request_csv():
+            df = read_timeseries_csv(args.csv)
+            df[["Date", col]].dropna()
+
+        store = PriceStore(args.csv, snapshot_dir=snap_dir)
+        store.matrix  # warm
+
+        def per_request_store():
+            pd.DataFrame({"Date": store.dates, "Price": store.column(col)}, copy=False)
+
+        print("\nPer request (one symbol series)")
+        print(f"  read_timeseries()   {_fmt(_timeit(per_request_csv, args.iterations))}")
+        print(f"  PriceStore (mmap)   {_fmt(_timeit(per_request_store, args.iterations))}")
+
+
+if __name__ == "__main__":
+    main()
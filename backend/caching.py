@@ -0,0 +1,192 @@
+# backend/caching.py
+"""
+Bounded in-memory caches: LRU eviction, optional TTL, hit/miss counters,
+and a single-flight, stale-while-revalidate cache for slow loaders.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after
+    they were stored (ttl=None → never).  Every lookup through get() is
+    counted as a hit or a miss; `in` checks are not counted."""
+
+    def __init__(self, maxsize=256, ttl=None, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: OrderedDict = OrderedDict()     # key -> (value, stored_at)
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _live(self, key):
+        """Entry for key if present and not expired.  Caller holds the lock."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        if self.ttl is not None and self._clock() - entry[1] >= self.ttl:
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live(key)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, stored_at=None):
+        """Store value; stored_at lets a copy loaded from disk keep its age."""
+        with self._lock:
+            self._data[key] = (value, self._clock() if stored_at is None else stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def age(self, key):
+        """Seconds since key was stored, or None if absent/expired."""
+        with self._lock:
+            entry = self._live(key)
+            return None if entry is _MISSING else self._clock() - entry[1]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._live(key) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size":        len(self._data),
+                "maxsize":     self.maxsize,
+                "ttl":         self.ttl,
+                "hits":        self.hits,
+                "misses":      self.misses,
+                "evictions":   self.evictions,
+                "expirations": self.expirations,
+                "hit_rate":    round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class RefreshingCache:
+    """Cache in front of a slow loader(key).
+
+    Entries are fresh for `ttl` seconds; after that they are still served
+    for up to `stale_ttl` more seconds while one background refresh runs
+    (stale-while-revalidate).  Concurrent misses for the same key share a
+    single load (single-flight) instead of each calling the loader.  Loader
+    errors are raised to every waiting caller and nothing is cached."""
+
+    def __init__(self, loader, ttl, stale_ttl=0, maxsize=256, clock=time.time):
+        self._loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: OrderedDict = OrderedDict()     # key -> (value, loaded_at)
+        self._inflight: dict = {}                   # key -> Future
+        self.hits = self.stale_hits = self.misses = self.coalesced = self.errors = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                age = self._clock() - entry[1]
+                if age < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        fut = self._inflight[key] = Future()
+                        threading.Thread(target=self._load, args=(key, fut), daemon=True).start()
+                    return entry[0]
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                self.misses += 1
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if owner:
+            self._load(key, fut)
+        return fut.result()
+
+    def _load(self, key, fut):
+        try:
+            value = self._loader(key)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self.errors += 1
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and self._clock() - entry[1] < self.ttl + self.stale_ttl
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            served  = self.hits + self.stale_hits
+            lookups = served + self.misses + self.coalesced
+            return {
+                "size":       len(self._data),
+                "maxsize":    self.maxsize,
+                "ttl":        self.ttl,
+                "stale_ttl":  self.stale_ttl,
+                "hits":       self.hits,
+                "stale_hits": self.stale_hits,
+                "misses":     self.misses,
+                "coalesced":  self.coalesced,
+                "errors":     self.errors,
+                "in_flight":  len(self._inflight),
+                "hit_rate":   round(served / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,259 @@
+# backend/forecast_jobs.py
+"""
+Forecast job subsystem.
+
+Model fits (auto_arima, SARIMAX, arch) are CPU-bound and hold the GIL, so
+they run in a ProcessPoolExecutor instead of Flask request threads.  Jobs
+are de-duplicated per key (one in-flight fit per symbol/horizon), the queue
+is bounded, and each job reports queued → running → done/failed together
+with the worker's progress.  A job may also be a group of parts fitted in
+separate workers at once and combined in the parent (submit_group).  If a
+worker dies (OOM kill, segfault) the pool's jobs fail and the next submit
+starts a fresh pool.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+FORECAST_WORKERS    = int(os.environ.get("FORECAST_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+FORECAST_QUEUE_SIZE = int(os.environ.get("FORECAST_QUEUE_SIZE", 32))   # waiting jobs beyond busy workers
+FINISHED_JOBS_KEPT  = 256
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when the bounded forecast queue cannot take another job."""
+
+
+class ForecastJob:
+    def __init__(self, job_id, key, future, progress, parts=None):
+        self.id = job_id
+        self.key = key
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._finished = threading.Event()      # set once on_done has run
+        self._progress = progress
+        # progress ids written by the worker(s): the job id, or one per part
+        self._progress_ids = [f"{job_id}.{p}" for p in parts] if parts else [job_id]
+
+    def result(self, timeout=None):
+        """The job's result once its on_done callback has finished with it.
+        future.result() wakes waiters before done-callbacks run, so it can
+        hand out a result that on_done is still changing.  Raises
+        TimeoutError, or the job's exception."""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f"forecast job {self.id} not finished after {timeout}s")
+        return self.future.result(timeout=0)
+
+    def _part_progress(self) -> list:
+        return [dict(self._progress.get(pid, {})) for pid in self._progress_ids
+                if pid in self._progress]
+
+    @property
+    def state(self) -> str:
+        if self._finished.is_set():             # result stored, not just computed
+            if self.future.cancelled() or self.future.exception() is not None:
+                return "failed"
+            return "done"
+        return "running" if self._part_progress() else "queued"
+
+    def to_dict(self) -> dict:
+        state = self.state
+        infos = self._part_progress() if state != "queued" else []
+        pct = sum(i.get("pct", 0) for i in infos) / len(self._progress_ids)
+        out = {
+            "job_id":       self.id,
+            "status":       state,
+            "stage":        ",".join(i["stage"] for i in infos if i.get("stage")) or None,
+            "progress":     100 if state == "done" else round(pct),
+            "submitted_at": self.submitted_at,
+        }
+        if state == "failed" and not self.future.cancelled():
+            out["error"] = str(self.future.exception())
+        return out
+
+
+def _run_job(job_id, progress, fn, args, kwargs):
+    """Worker-process entry point: runs fn and mirrors its progress."""
+    progress[job_id] = {"stage": "started", "pct": 0}
+
+    def report(stage, pct):
+        progress[job_id] = {"stage": stage, "pct": pct}
+
+    return fn(*args, progress=report, **kwargs)
+
+
+class ForecastJobManager:
+    def __init__(self, max_workers=FORECAST_WORKERS, max_pending=FORECAST_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._active: dict = {}                 # key -> ForecastJob (not finished)
+        self._jobs: OrderedDict = OrderedDict() # job_id -> ForecastJob (bounded)
+
+    def _ensure_pool(self):
+        # spawn, not fork: workers start clean instead of inheriting the
+        # parent's threads and locks.  They re-import the main script, so
+        # app.py skips its process setup there (see app.init_app)
+        ctx = multiprocessing.get_context("spawn")
+        if self._manager is None:
+            self._manager  = ctx.Manager()
+            self._progress = self._manager.dict()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def _discard_pool(self, executor):
+        """Drop a broken executor so the next submit builds a new one; its
+        pending futures have already failed with BrokenProcessPool.  Caller
+        holds self._lock."""
+        if executor is None or self._executor is not executor:
+            return
+        print("[jobs] Forecast worker pool broken — starting a new one")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._ensure_pool()
+
+    def _submit(self, job_id, fn, args, kwargs) -> Future:
+        """executor.submit(_run_job, ...), retried once on a fresh pool if the
+        current one turns out to be broken.  Caller holds self._lock."""
+        try:
+            return self._executor.submit(_run_job, job_id, self._progress, fn, args, kwargs)
+        except BrokenProcessPool:
+            self._discard_pool(self._executor)
+            return self._executor.submit(_run_job, job_id, self._progress, fn, args, kwargs)
+
+    def _reserve(self, key):
+        """Existing in-flight job for key, or None after checking capacity.
+        Caller holds self._lock."""
+        job = self._active.get(key)
+        if job is not None:
+            return job
+        if len(self._active) >= self.max_workers + self.max_pending:
+            raise JobQueueFull(f"forecast queue full ({len(self._active)} jobs)")
+        self._ensure_pool()
+        return None
+
+    def _register(self, job):
+        """Track a new job and trim finished ones.  Caller holds self._lock."""
+        self._active[job.key] = job
+        self._jobs[job.id] = job
+        while len(self._jobs) > FINISHED_JOBS_KEPT + len(self._active):
+            old_id, old = next(iter(self._jobs.items()))
+            if not old.future.done():
+                break
+            self._jobs.pop(old_id)
+            for pid in old._progress_ids:
+                self._progress.pop(pid, None)
+
+    def submit(self, key, fn, *args, on_done=None, **kwargs) -> ForecastJob:
+        """Queue fn(*args, progress=..., **kwargs) unless `key` is already in
+        flight, in which case the existing job is returned.  on_done(result)
+        runs in the parent process when the job succeeds."""
+        with self._lock:
+            job = self._reserve(key)
+            if job is not None:
+                return job
+            job_id = uuid.uuid4().hex[:12]
+            future = self._submit(job_id, fn, args, kwargs)
+            executor = self._executor
+            job = ForecastJob(job_id, key, future, self._progress)
+            self._register(job)
+
+        future.add_done_callback(lambda f: self._finish(job, f, on_done, executor))
+        return job
+
+    def submit_group(self, key, parts: dict, combine, on_done=None) -> ForecastJob:
+        """Run each {name: (fn, args)} part in its own worker concurrently and
+        resolve the job with combine({name: part result}) once all finish."""
+        with self._lock:
+            job = self._reserve(key)
+            if job is not None:
+                return job
+            job_id = uuid.uuid4().hex[:12]
+            group = Future()
+            group.set_running_or_notify_cancel()
+            futures = {
+                name: self._submit(f"{job_id}.{name}", fn, args, {})
+                for name, (fn, args) in parts.items()
+            }
+            executor = self._executor
+            job = ForecastJob(job_id, key, group, self._progress, parts=list(parts))
+            self._register(job)
+
+        remaining = [len(futures)]
+        remaining_lock = threading.Lock()
+
+        def part_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                group.set_result(combine({name: f.result() for name, f in futures.items()}))
+            except Exception as e:
+                group.set_exception(e)
+
+        group.add_done_callback(lambda f: self._finish(job, f, on_done, executor))
+        for f in futures.values():
+            f.add_done_callback(part_done)
+        return job
+
+    def _finish(self, job, future, on_done, executor=None):
+        job.finished_at = time.time()
+        try:
+            if future.cancelled():
+                return
+            err = future.exception()
+            if err is not None:
+                print(f"[jobs] Forecast job {job.id} {job.key} failed: {err}")
+                if isinstance(err, BrokenProcessPool):
+                    with self._lock:
+                        self._discard_pool(executor)
+                return
+            if on_done is not None:
+                try:
+                    on_done(future.result())
+                except Exception as e:
+                    print(f"[jobs] on_done for {job.key} failed: {e}")
+        finally:
+            # Only release the key once the result is cached, so a request
+            # arriving in between never starts a duplicate fit
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            job._finished.set()
+
+    def get(self, job_id) -> ForecastJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self, key) -> ForecastJob | None:
+        with self._lock:
+            return self._active.get(key)
+
+    def latest(self, key) -> ForecastJob | None:
+        """Most recent job (active or finished) for key."""
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                return job
+            for job in reversed(self._jobs.values()):
+                if job.key == key:
+                    return job
+        return None
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._manager.shutdown()
+                self._executor = self._manager = self._progress = None
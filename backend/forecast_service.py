@@ -0,0 +1,138 @@
+# backend/forecast_service.py
+"""
+Forecast inputs and persistence shared by the Flask app and the nightly
+batch (batch_forecast.py), importable without starting the app: the price
+series a forecast is fitted on, and the SQLite forecast store with its
+freshness rules and the per-symbol model state used for warm starts.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import caching
+import forecast_store
+import forecasting
+import price_store
+import realtime as rt
+
+BASE_DIR     = os.path.dirname(__file__)
+DATA_CSV     = os.path.join(BASE_DIR, "data", "market_data.csv")
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "data", "market_snapshot")
+CACHE_DIR    = os.path.join(BASE_DIR, "data", "forecast_cache")
+FORECAST_DB  = os.path.join(CACHE_DIR, "forecasts.sqlite")
+
+# Forecasts are keyed on a fingerprint of their input prices plus the model
+# parameters and forecasting.MODEL_VERSION, so a cached forecast stays valid
+# until a new bar arrives or the model changes — which is why this is 7 days
+# rather than the 24h a purely time-based cache would use: a Friday
+# forecast survives the weekend.  The TTL only bounds how long unused
+# entries are kept.
+CACHE_TTL_SECONDS = 7 * 86400
+
+# Shared historical price matrix (parsed once, memory-mapped from the snapshot)
+PRICES = price_store.get_store(DATA_CSV, snapshot_dir=SNAPSHOT_DIR)
+
+# Live-history fallback for symbols missing from the CSV
+_live_series_cache = caching.TTLCache(maxsize=64, ttl=rt.LIVE_CACHE_TTL)
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_series(symbol):
+    """Return a clean Date + Price series.
+    Accepts any form: clean symbol, CSV col, or yf ticker.
+    Prefers CSV data (instant) — falls back to live yfinance if CSV is missing."""
+    clean = rt.resolve(symbol) or symbol
+
+    # ── Try CSV first (instant, no network) ──────────────────────
+    col = PRICES.column_for(symbol)
+    if col is not None:
+        values = PRICES.column(col)
+        mask   = ~np.isnan(values) & ~PRICES.dates.isna()
+        if mask.all():
+            out = pd.DataFrame({"Date": PRICES.dates, "Price": values}, copy=False)
+        else:
+            out = pd.DataFrame({"Date": PRICES.dates[mask], "Price": values[mask]})
+        if not out.empty:
+            return out
+
+    # ── Fallback: live yfinance history (kept for one quote TTL) ─
+    cached = _live_series_cache.get(clean)
+    if cached is not None:
+        return cached
+    live = rt.get_history(clean, period="5y")
+    if live:
+        ldf = pd.DataFrame(live)
+        ldf["Date"]  = pd.to_datetime(ldf["date"])
+        ldf["Price"] = pd.to_numeric(ldf["price"], errors="coerce")
+        ldf = ldf[["Date", "Price"]].dropna().sort_values("Date").reset_index(drop=True)
+        if not ldf.empty:
+            _live_series_cache.set(clean, ldf)
+            return ldf
+
+    return pd.DataFrame()
+
+
+def forecast_inputs(symbol):
+    """(prices, last_date, fingerprint) for symbol, or None without enough
+    history (see forecasting.forecast_inputs)."""
+    return forecasting.forecast_inputs(get_price_series(symbol))
+
+
+# ── Forecast store ──────────────────────────────────────────────────────────
+def store() -> forecast_store.ForecastStore:
+    """The process's forecast store (one SQLite file shared by all workers),
+    opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _store = forecast_store.ForecastStore(FORECAST_DB)
+        return _store
+
+
+def load_cached(key):
+    """Forecast from the store if it was fitted on the same input data
+    → (data, cached_at), else (None, None)."""
+    try:
+        return store().load(key, CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"[cache] Failed to read cache for {key[0]}: {e}")
+        return None, None
+
+
+def cache_fresh(key) -> bool:
+    """Freshness check from the row header only (payload not decoded)."""
+    return store().fresh(key, CACHE_TTL_SECONDS)
+
+
+def model_state(symbol):
+    """Previous fit's parameters for warm-starting the next refit, or None."""
+    try:
+        return store().get_state(symbol)
+    except Exception as e:
+        print(f"[cache] Failed to read model state for {symbol}: {e}")
+        return None
+
+
+def save_forecast(key, result, warm=None):
+    """Finish a fit's result in place — pop its model state (kept for the
+    next warm start, merged over `warm`, the state it started from) and add
+    the display names — then persist it (one atomic row write)."""
+    symbol = key[0]
+    state = result.pop("state", None)
+    if state:
+        try:
+            store().put_state(symbol, {**(warm or {}), **state})
+        except Exception as e:
+            print(f"[cache] Failed to save model state for {symbol}: {e}")
+    result["symbol_clean"] = rt.resolve(symbol) or symbol
+    result["display_name"] = rt.get_display_name(symbol)
+    try:
+        store().put(forecast_store.store_key(key), key[0], key[1], result, data_hash=key[3])
+    except Exception as e:
+        print(f"[cache] Failed to save cache for {key[0]}: {e}")
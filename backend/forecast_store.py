@@ -0,0 +1,170 @@
+# backend/forecast_store.py
+"""
+Persistent forecast cache in a single SQLite file.
+
+One row per cache key.  The header columns (cached_at, data_hash, steps)
+answer freshness checks without touching the payload; the nine forecast
+bands (arima/sarima/garch × price/lower/upper) are stored as one packed
+float64 array and the remaining fields as a small JSON blob.  Writes are
+single transactions, so readers never see a half-written forecast, and
+WAL mode lets several worker processes share the file.
+
+A second table keeps each symbol's last fitted model parameters (orders,
+coefficients, when the ARIMA order was last searched) so the next refit can
+warm-start from them.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+MODELS = ("arima", "sarima", "garch")
+FIELDS = ("price", "lower", "upper")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    cache_key   TEXT PRIMARY KEY,
+    symbol      TEXT NOT NULL,
+    steps       INTEGER NOT NULL,
+    cached_at   REAL NOT NULL,
+    data_hash   TEXT,
+    start_date  TEXT NOT NULL,
+    meta        TEXT NOT NULL,
+    bands       BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS forecasts_cached_at ON forecasts (cached_at);
+CREATE TABLE IF NOT EXISTS model_state (
+    symbol      TEXT PRIMARY KEY,
+    updated_at  REAL NOT NULL,
+    state       TEXT NOT NULL
+);
+"""
+
+
+def store_key(key) -> str:
+    """forecasting.forecast_key() tuple → row key.  The fingerprint is kept
+    in the row's data_hash column, so one row per symbol/horizon is
+    retained."""
+    symbol, steps, params, _ = key
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()[:10]
+    return f"{symbol}|{steps}|{digest}"
+
+
+def encode(result: dict):
+    """Forecast dict → (start_date, meta JSON, packed bands)."""
+    steps = len(result["arima"])
+    bands = np.empty((len(MODELS) * len(FIELDS), steps), dtype=np.float64)
+    for i, model in enumerate(MODELS):
+        for j, field in enumerate(FIELDS):
+            bands[i * len(FIELDS) + j] = [row[field] for row in result[model]]
+    meta = {k: v for k, v in result.items() if k not in MODELS}
+    start = result["arima"][0]["date"] if steps else ""
+    return start, json.dumps(meta), bands.tobytes()
+
+
+def decode(start_date, steps, meta, blob) -> dict:
+    """Inverse of encode().  Forecast dates are consecutive business days."""
+    bands = np.frombuffer(blob, dtype=np.float64).reshape(len(MODELS) * len(FIELDS), steps)
+    dates = [d.strftime("%Y-%m-%d") for d in pd.bdate_range(start=start_date, periods=steps)] if steps else []
+    result = json.loads(meta)
+    for i, model in enumerate(MODELS):
+        p, lo, hi = (bands[i * len(FIELDS) + j].tolist() for j in range(len(FIELDS)))
+        result[model] = [
+            {"date": d, "price": round(a, 2), "lower": round(b, 2), "upper": round(c, 2)}
+            for d, a, b, c in zip(dates, p, lo, hi)
+        ]
+    return result
+
+
+class ForecastStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(self, key, symbol, steps, result, data_hash=None, cached_at=None):
+        start, meta, blob = encode(result)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, symbol, int(steps), cached_at or time.time(), data_hash, start, meta, blob),
+            )
+
+    def header(self, key):
+        """(cached_at, data_hash) without reading the payload, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cached_at, data_hash FROM forecasts WHERE cache_key = ?", (key,)
+            ).fetchone()
+        return row
+
+    def get(self, key):
+        """(result, cached_at, data_hash) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT steps, cached_at, data_hash, start_date, meta, bands FROM forecasts WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        steps, cached_at, data_hash, start, meta, blob = row
+        return decode(start, steps, meta, blob), cached_at, data_hash
+
+    def load(self, key, ttl):
+        """(result, cached_at) for a forecast_key() fitted on the same input
+        data within `ttl` seconds, else (None, None)."""
+        row = self.get(store_key(key))
+        if row and row[2] == key[3] and time.time() - row[1] < ttl:
+            return row[0], row[1]
+        return None, None
+
+    def fresh(self, key, ttl) -> bool:
+        """load() would hit — checked from the row header only (payload not
+        decoded)."""
+        header = self.header(store_key(key))
+        return bool(header) and header[1] == key[3] and time.time() - header[0] < ttl
+
+    def recent(self, limit, max_age=None):
+        """Yield (key, result, cached_at, data_hash), newest first."""
+        since = time.time() - max_age if max_age else 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cache_key, steps, cached_at, data_hash, start_date, meta, bands FROM forecasts "
+                "WHERE cached_at >= ? ORDER BY cached_at DESC LIMIT ?",
+                (since, int(limit)),
+            ).fetchall()
+        for key, steps, cached_at, data_hash, start, meta, blob in rows:
+            yield key, decode(start, steps, meta, blob), cached_at, data_hash
+
+    def purge(self, older_than):
+        """Delete entries stored more than `older_than` seconds ago."""
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM forecasts WHERE cached_at < ?", (time.time() - older_than,))
+        return cur.rowcount
+
+    def get_state(self, symbol) -> dict | None:
+        """Last fitted model state for symbol (see forecasting.assemble_forecast)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM model_state WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_state(self, symbol, state):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_state VALUES (?, ?, ?)",
+                (symbol, time.time(), json.dumps(state)),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
@@ -0,0 +1,375 @@
+# backend/forecasting.py
+"""
+Forecast models (ARIMA, SARIMA, GARCH on daily closes).
+Everything here is a pure function of its inputs — no Flask, no caches — so
+it can run in a worker process (see forecast_jobs.py).
+"""
+
+import hashlib
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from arch import arch_model
+from pmdarima import ARIMA, auto_arima
+
+# Monte Carlo settings for the GARCH price cone.  More paths give tighter
+# percentile bands; the simulation is vectorized so 10k–100k paths is cheap.
+GARCH_PATHS          = int(os.environ.get("GARCH_PATHS", 500))
+GARCH_QUANTILES_ONLY = os.environ.get("GARCH_QUANTILES_ONLY", "false").lower() == "true"
+GARCH_SEED           = 42          # reproducible bands for the same fit
+
+# How one symbol's three fits are scheduled:
+#   sequential — ARIMA → SARIMA → GARCH in one worker
+#   parallel   — GARCH in its own worker alongside the ARIMA → SARIMA chain
+#   eager      — all three at once; SARIMA starts with DEFAULT_SARIMA_ORDER
+#                instead of waiting for auto_arima's order search
+FORECAST_MODE = os.environ.get("FORECAST_MODE", "parallel").lower()
+
+# Part of every cache key: bump it with any change to the fitting or
+# assembly code that changes a forecast's output, so cached forecasts from
+# the old code are not served until their TTL runs out.
+MODEL_VERSION = 1
+
+HISTORY_WINDOW       = 756         # ≈3 years of trading days
+SARIMA_WINDOW        = 500
+DEFAULT_SARIMA_ORDER = (1, 1, 0)
+SEASONAL_ORDER       = (1, 0, 1, 5)   # P=1,D=0,Q=1,m=5 — lightweight
+
+# Warm starts: a refit after a new bar reuses the previous fit's ARIMA order
+# and every model's parameters as starting values.  The full auto_arima
+# order search is only re-run once the stored order is this old.
+ORDER_SEARCH_INTERVAL = float(os.environ.get("ORDER_SEARCH_DAYS", 7)) * 86400
+
+
+def simulate_garch_paths(last_price, mu, daily_var, n_paths=GARCH_PATHS, seed=GARCH_SEED):
+    """Simulate (n_paths × steps) price paths.
+    mu is the daily mean return in %, daily_var the GARCH variance forecast
+    (%², one entry per step).  All shocks are drawn in one call and paths are
+    built with a cumulative product."""
+    rng   = np.random.default_rng(seed)
+    sigma = np.sqrt(np.maximum(np.asarray(daily_var, dtype=float), 0.0)) / 100.0
+    gross = 1.0 + mu / 100.0 + rng.standard_normal((n_paths, len(sigma))) * sigma
+    return last_price * np.cumprod(gross, axis=1)
+
+
+def garch_price_bands(last_price, mu, daily_var, n_paths=GARCH_PATHS,
+                      seed=GARCH_SEED, quantiles_only=GARCH_QUANTILES_ONLY):
+    """Median and 5th/95th percentile price per step → (median, lower, upper).
+
+    quantiles_only walks the paths one step at a time and keeps just the
+    current price of each path, so memory is O(n_paths) instead of
+    O(n_paths × steps)."""
+    if not quantiles_only:
+        paths = simulate_garch_paths(last_price, mu, daily_var, n_paths, seed)
+        lower, median, upper = np.percentile(paths, [5, 50, 95], axis=0)
+        return median, lower, upper
+
+    rng   = np.random.default_rng(seed)
+    sigma = np.sqrt(np.maximum(np.asarray(daily_var, dtype=float), 0.0)) / 100.0
+    bands = np.empty((3, len(sigma)))
+    price = np.full(n_paths, float(last_price))
+    for t, sig in enumerate(sigma):
+        price *= 1.0 + mu / 100.0 + rng.standard_normal(n_paths) * sig
+        bands[:, t] = np.percentile(price, [5, 50, 95])
+    lower, median, upper = bands
+    return median, lower, upper
+
+
+def model_params(mode=None) -> tuple:
+    """Everything besides the input data that changes a forecast's output —
+    part of every forecast cache key."""
+    return (
+        MODEL_VERSION, mode or FORECAST_MODE, HISTORY_WINDOW, SARIMA_WINDOW, SEASONAL_ORDER,
+        GARCH_PATHS, GARCH_QUANTILES_ONLY,
+    )
+
+
+def data_fingerprint(prices, last_date) -> str:
+    """Identity of a forecast's input: last bar date, series length and a hash
+    of the fitted window.  Unchanged until a new bar actually arrives."""
+    window = np.ascontiguousarray(_window(prices))
+    digest = hashlib.sha1(window.tobytes()).hexdigest()[:16]
+    return f"{pd.Timestamp(last_date):%Y-%m-%d}:{len(prices)}:{digest}"
+
+
+def forecast_inputs(series):
+    """(prices, last_date, fingerprint) from a Date + Price frame, or None
+    without enough history.  The fingerprint changes only when a new bar
+    arrives."""
+    if series.empty or not usable_history(series["Price"]):
+        return None
+    prices    = series["Price"].to_numpy(dtype=float)
+    last_date = series["Date"].iloc[-1]
+    return prices, last_date, data_fingerprint(prices, last_date)
+
+
+def forecast_key(symbol, steps, fingerprint, mode=None) -> tuple:
+    """Forecast cache key: (symbol, steps, model params, fingerprint)."""
+    return (symbol, int(steps), model_params(mode), fingerprint)
+
+
+def _window(prices):
+    """Last HISTORY_WINDOW closes (for speed + relevance)."""
+    prices = np.asarray(prices, dtype=float)
+    return prices[-min(len(prices), HISTORY_WINDOW):]
+
+
+def _as_array(x):
+    if hasattr(x, 'values'):
+        return np.array(x.values, dtype=float)
+    return np.array(x, dtype=float)
+
+
+def _warm_arima(symbol, prices, prev):
+    """Refit the previous ARIMA order from its last parameters, or None when
+    there is no usable state or the order search is due."""
+    if not prev or time.time() - prev.get("searched_at", 0) >= ORDER_SEARCH_INTERVAL:
+        return None
+    try:
+        am = ARIMA(order=tuple(prev["order"]), start_params=np.asarray(prev["params"], dtype=float),
+                   with_intercept=prev.get("with_intercept", True), suppress_warnings=True)
+        return am.fit(prices)
+    except Exception as e:
+        print(f"[forecast] ARIMA warm start failed for {symbol}, searching orders: {e}")
+        return None
+
+
+# ── ARIMA on price levels (d=1 handles non-stationarity) ────────────────────
+def fit_arima(symbol, prices, steps=30, warm=None):
+    """warm is the previous fit's state (see assemble_forecast); with it the
+    stepwise order search is skipped until ORDER_SEARCH_INTERVAL elapses."""
+    prices = _window(prices)
+    t0 = time.time()
+    prev = (warm or {}).get("arima")
+    out = {"prices": None, "lower": None, "upper": None, "order": None, "warm": False}
+    try:
+        am = _warm_arima(symbol, prices, prev)
+        if am is not None:
+            out["warm"] = True
+            searched_at = prev["searched_at"]
+        else:
+            am = auto_arima(
+                prices, seasonal=False, stepwise=True,
+                suppress_warnings=True, error_action="ignore",
+                max_p=5, max_q=5, max_d=2, d=1,       # force at least d=1
+                information_criterion="aic", n_jobs=1,
+            )
+            searched_at = time.time()
+        fc = am.predict(n_periods=steps, return_conf_int=True, alpha=0.05)
+        out["prices"] = _as_array(fc[0])
+        out["lower"]  = _as_array(fc[1][:, 0])
+        out["upper"]  = _as_array(fc[1][:, 1])
+        out["order"]  = tuple(am.order)
+        out["state"]  = {
+            "order":          list(am.order),
+            "with_intercept": bool(am.with_intercept),
+            "params":         _as_array(am.params()).tolist(),
+            "searched_at":    searched_at,
+        }
+        print(f"[forecast]   ARIMA order={am.order}{' (warm)' if out['warm'] else ''} — terminal ₹{out['prices'][-1]:.2f}")
+    except Exception as e:
+        print(f"[forecast] ARIMA failed for {symbol}: {e}")
+    out["fit_seconds"] = round(time.time() - t0, 3)
+    return out
+
+
+# ── SARIMA on price levels (d=1, m=5 weekly seasonality) ────────────────────
+# Uses statsmodels SARIMAX with forced seasonal component so it differs
+# from plain ARIMA.  D=0 (no seasonal differencing) to avoid blowups.
+def fit_sarima(symbol, prices, steps=30, order=None, warm=None):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    import warnings
+    warnings.filterwarnings("ignore")
+
+    prices = _window(prices)
+    last_price = float(prices[-1])
+    base_order = tuple(order) if order else DEFAULT_SARIMA_ORDER
+    t0 = time.time()
+    prev = (warm or {}).get("sarima")
+    start = None
+    if prev and tuple(prev["order"]) == base_order:
+        start = np.asarray(prev["params"], dtype=float)
+    out = {"prices": None, "lower": None, "upper": None, "order": base_order, "warm": start is not None}
+    try:
+        # Use only last 500 points to keep memory / time reasonable
+        price_slice = prices[-min(len(prices), SARIMA_WINDOW):]
+        smodel = SARIMAX(price_slice, order=base_order, seasonal_order=SEASONAL_ORDER,
+                         enforce_stationarity=False, enforce_invertibility=False)
+        sfit   = smodel.fit(start_params=start, disp=False, maxiter=150)
+        sfc    = sfit.get_forecast(steps=steps)
+        sci_arr = np.asarray(sfc.conf_int(alpha=0.05), dtype=float)
+        out["prices"] = np.asarray(sfc.predicted_mean, dtype=float)
+        out["lower"]  = np.maximum(sci_arr[:, 0], last_price * 0.5)
+        out["upper"]  = sci_arr[:, 1]
+        out["state"]  = {"order": list(base_order), "params": _as_array(sfit.params).tolist()}
+        print(f"[forecast]   SARIMA order={base_order} seasonal={SEASONAL_ORDER} — terminal ₹{float(out['prices'][-1]):.2f}")
+    except Exception as e:
+        print(f"[forecast] SARIMA failed for {symbol}: {e}")
+    out["fit_seconds"] = round(time.time() - t0, 3)
+    return out
+
+
+# ── GARCH(1,1) — Price Prediction via Monte Carlo Simulation ────────────────
+# Fit GARCH on % returns, forecast daily variance, then simulate N price
+# paths using the mean return + GARCH volatility.  The median path is the
+# prediction line; 5th/95th percentile paths give confidence bands.
+def fit_garch(symbol, prices, steps=30, warm=None):
+    prices = _window(prices)
+    last_price = float(prices[-1])
+    pct_ret = np.diff(prices) / prices[:-1] * 100   # percentage returns
+    t0 = time.time()
+    prev = (warm or {}).get("garch")
+    start = np.asarray(prev["params"], dtype=float) if prev else None
+    out = {"prices": None, "lower": None, "upper": None, "warm": start is not None}
+    try:
+        gm = arch_model(pct_ret, vol="Garch", p=1, q=1,
+                         mean="Constant", dist="normal")
+        gf = gm.fit(disp="off", starting_values=start, options={"maxiter": 300})
+
+        # Extract fitted mean return (daily %) and variance forecast
+        mu = float(gf.params.get("mu", pct_ret.mean()))  # daily mean return %
+        variance_fc = gf.forecast(horizon=steps, reindex=False)
+        daily_var = variance_fc.variance.values[-1]       # array len=steps
+
+        # Monte Carlo: all paths simulated in one vectorized batch
+        median, lower, upper = garch_price_bands(last_price, mu, daily_var)
+        out["prices"] = _as_array(median)
+        out["lower"]  = np.maximum(_as_array(lower), last_price * 0.3)
+        out["upper"]  = _as_array(upper)
+        out["state"]  = {"params": _as_array(gf.params).tolist()}
+        print(f"[forecast]   GARCH(1,1) — terminal ₹{out['prices'][-1]:.2f}  band: ₹{out['lower'][-1]:.0f} – ₹{out['upper'][-1]:.0f}")
+    except Exception as e:
+        print(f"[forecast] GARCH failed for {symbol}: {e}")
+    out["fit_seconds"] = round(time.time() - t0, 3)
+    return out
+
+
+def usable_history(prices) -> bool:
+    """Enough closes to fit anything (50 bars, 30 returns in the window)."""
+    return len(prices) >= 50 and len(_window(prices)) > 30
+
+
+def assemble_forecast(prices, last_date, steps, arima, sarima, garch, mode="sequential", elapsed=None):
+    """Combine per-model fits into the cached/served forecast dict.
+    A model that failed falls back to a flat line at the last price (SARIMA
+    falls back to ARIMA with a small offset so the two are not identical).
+    The fitted parameters come back under "state" — the caller pops them and
+    passes them as `warm` to the next refit."""
+    prices = np.asarray(prices, dtype=float)
+    last_price = float(prices[-1])
+    flat = np.full(steps, last_price)
+    future_dates = pd.bdate_range(start=pd.Timestamp(last_date) + timedelta(days=1), periods=steps)
+
+    def bands(fit):
+        if fit is None or fit.get("prices") is None:
+            return None
+        return fit["prices"], fit["lower"], fit["upper"]
+
+    arima_b = bands(arima) or (flat, flat, flat)
+    sarima_b = bands(sarima)
+    if sarima_b is None:
+        # Fallback: copy ARIMA but add small offset so it's not identical
+        noise = np.linspace(0, last_price * 0.005, steps)
+        sarima_b = (arima_b[0] + noise, arima_b[1] - abs(noise) * 2, arima_b[2] + abs(noise) * 2)
+    garch_b = bands(garch) or (flat, flat, flat)
+
+    # Direction = ARIMA terminal price vs current
+    direction = "UP" if float(arima_b[0][-1]) > last_price else "DOWN"
+
+    def to_series(vals, lower, upper, dates):
+        return [
+            {
+                "date":  d.strftime("%Y-%m-%d"),
+                "price": round(float(p), 2),
+                "lower": round(float(l), 2),
+                "upper": round(float(u), 2),
+            }
+            for d, p, l, u in zip(dates, vals, lower, upper)
+        ]
+
+    fits = {name: fit for name, fit in (("arima", arima), ("sarima", sarima), ("garch", garch)) if fit}
+    fit_times = {name: fit.get("fit_seconds") for name, fit in fits.items()}
+    return {
+        "arima":     to_series(*arima_b,  future_dates),
+        "sarima":    to_series(*sarima_b, future_dates),
+        "garch":     to_series(*garch_b,  future_dates),
+        "direction": direction,
+        "last_price": last_price,
+        "meta": {
+            "mode":          mode,
+            "fit_times":     fit_times,
+            "total_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "arima_order":   arima.get("order") if arima else None,
+            "sarima_order":  sarima.get("order") if sarima else None,
+            "observations":  int(min(len(prices), HISTORY_WINDOW)),
+            "warm_start":    {name: fit.get("warm", False) for name, fit in fits.items()},
+        },
+        "state": {name: fit["state"] for name, fit in fits.items() if fit.get("state")},
+    }
+
+
+def run_forecast(symbol, prices, last_date, steps=30, progress=None, warm=None):
+    """
+    Trains ARIMA, SARIMA, and GARCH on the last 3 years of daily closes.
+    • ARIMA  → price-level forecast (auto_arima on prices, d=1)
+    • SARIMA → price-level forecast with weekly seasonality (m=5)
+    • GARCH  → volatility cone: predicts how much the price may swing
+               (upper/lower bands widen over time; center = last_price)
+
+    `prices` is the full close history (oldest first) and `last_date` the
+    date of its final bar.  Pure function of its inputs — safe to run in a
+    worker process.  `progress(stage, pct)` is called as each model finishes.
+    `warm` is the previous fit's state, used to warm-start each model.
+    """
+    report = progress or (lambda stage, pct: None)
+    if not usable_history(prices):
+        return None
+
+    print(f"[forecast] {symbol} — {len(_window(prices))} obs, fitting ARIMA/SARIMA/GARCH...")
+    t0 = time.time()
+    arima = fit_arima(symbol, prices, steps, warm=warm)
+    report("arima", 33)
+    sarima = fit_sarima(symbol, prices, steps, order=arima["order"], warm=warm)
+    report("sarima", 66)
+    garch = fit_garch(symbol, prices, steps, warm=warm)
+    report("garch", 100)
+    print(f"[forecast] {symbol} done in {time.time()-t0:.1f}s")
+
+    return assemble_forecast(prices, last_date, steps, arima, sarima, garch,
+                             mode="sequential", elapsed=time.time() - t0)
+
+
+# ── Per-model parts for the parallel / eager modes ──────────────────────────
+# Each runs in its own worker; the parent combines them with assemble_forecast.
+def run_arima_sarima_part(symbol, prices, steps=30, warm=None, progress=None):
+    report = progress or (lambda stage, pct: None)
+    arima = fit_arima(symbol, prices, steps, warm=warm)
+    report("arima", 50)
+    sarima = fit_sarima(symbol, prices, steps, order=arima["order"], warm=warm)
+    report("sarima", 100)
+    return {"arima": arima, "sarima": sarima}
+
+
+def run_model_part(model, symbol, prices, steps=30, warm=None, progress=None):
+    fit = {"arima": fit_arima, "sarima": fit_sarima, "garch": fit_garch}[model]
+    kwargs = {"warm": warm}
+    if model == "sarima" and warm and "arima" in warm:
+        # eager mode: the last searched ARIMA order beats the fixed default
+        kwargs["order"] = warm["arima"]["order"]
+    out = {model: fit(symbol, prices, steps, **kwargs)}
+    if progress:
+        progress(model, 100)
+    return out
+
+
+def forecast_parts(symbol, prices, steps=30, mode=FORECAST_MODE, warm=None) -> dict:
+    """{part name: (fn, args)} to fit in parallel for the given mode."""
+    if mode == "eager":
+        return {m: (run_model_part, (m, symbol, prices, steps, warm)) for m in ("arima", "sarima", "garch")}
+    return {
+        "arima_sarima": (run_arima_sarima_part, (symbol, prices, steps, warm)),
+        "garch":        (run_model_part, ("garch", symbol, prices, steps, warm)),
+    }
@@ -0,0 +1,97 @@
+# backend/history_store.py
+"""
+Persistent daily-bar history in a single SQLite file.
+
+One row per (ticker, date) with OHLCV, plus a coverage row per ticker: the
+earliest date a full download was asked for (covered_from, "" = max), the
+last stored bar and when the ticker was last fetched.  realtime.py reads
+any period as a slice of the stored bars, downloads only the missing tail
+since the last stored bar, and goes back to the provider for a full
+download only when a longer period than ever before is requested.  WAL mode
+lets several worker processes share the file.
+"""
+
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker  TEXT NOT NULL,
+    date    TEXT NOT NULL,
+    open    REAL,
+    high    REAL,
+    low     REAL,
+    close   REAL NOT NULL,
+    volume  REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker        TEXT PRIMARY KEY,
+    covered_from  TEXT NOT NULL,
+    last_date     TEXT,
+    fetched_at    REAL NOT NULL
+);
+"""
+
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def coverage(self, ticker):
+        """(covered_from, last_date, fetched_at) or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT covered_from, last_date, fetched_at FROM coverage WHERE ticker = ?", (ticker,)
+            ).fetchone()
+
+    def put(self, ticker, frame, covered_from=None):
+        """Upsert the bars of a yfinance-shaped frame (later downloads win
+        on overlapping dates) and mark the ticker fetched now.  covered_from
+        ("" = max) widens the recorded coverage; None leaves it as is."""
+        rows = []
+        if frame is not None and not frame.empty:
+            bars = frame.reindex(columns=FIELDS).dropna(subset=["Close"])
+            days = [ts.strftime("%Y-%m-%d") for ts in bars.index]
+            rows = [(ticker, d, *vals) for d, vals in zip(days, bars.itertuples(index=False, name=None))]
+        with self._lock, self._conn:
+            if rows:
+                self._conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            old = self._conn.execute(
+                "SELECT covered_from FROM coverage WHERE ticker = ?", (ticker,)
+            ).fetchone()
+            span = [c for c in (covered_from, old[0] if old else None) if c is not None]
+            last = self._conn.execute("SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,)).fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+                (ticker, min(span) if span else last or "", last, time.time()),
+            )
+
+    def read(self, ticker, start=None) -> pd.DataFrame:
+        """Stored bars from `start` (ISO date, None = all), oldest first, as
+        a frame with a DatetimeIndex and the yfinance column names."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? AND date >= ? ORDER BY date",
+                (ticker, start or ""),
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=["Date"] + FIELDS)
+        return frame.set_index(pd.DatetimeIndex(pd.to_datetime(frame.pop("Date")), name="Date"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            tickers, bars = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM coverage), (SELECT COUNT(*) FROM bars)"
+            ).fetchone()
+        return {"tickers": tickers, "bars": bars}
@@ -0,0 +1,159 @@
+# backend/live_stream.py
+"""
+Server-Sent Events fan-out for live quotes.
+
+One QuoteBroadcaster is registered as a realtime refresh listener.  Every
+time the background refresh replaces the quote cache it asks realtime for
+the symbols changed since the last version it sent, serializes them once
+and hands the same bytes to every connected client's queue, so N open
+dashboards cost one JSON build per refresh instead of N polls.
+
+Each client first receives a `snapshot` event (all quotes) and then
+`quotes` events carrying only the symbols whose values changed.  Event ids
+are quote-cache versions, so a reconnect with Last-Event-ID resumes with
+just the changes it missed.  A client that falls too far behind is
+resynchronised with a fresh snapshot.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import realtime as rt
+
+STREAM_HEARTBEAT_SECONDS = 15      # comment line so proxies keep the connection open
+STREAM_POLL_SECONDS      = int(os.environ.get("STREAM_POLL_SECONDS", 30))
+STREAM_QUEUE_SIZE        = 32      # pending events per client before resync
+
+
+def sse_event(event, payload, event_id=None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+
+def _stamp(ts=None) -> str:
+    return (datetime.fromtimestamp(ts) if ts else datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def delta_event(version, changed, removed) -> bytes:
+    return sse_event("quotes", {
+        "version":    version,
+        "updated_at": _stamp(),
+        "changed":    list(changed.values()),
+        "removed":    removed,
+    }, event_id=version)
+
+
+class QuoteBroadcaster:
+    def __init__(self, poll_seconds=STREAM_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._clients: set = set()         # queue.Queue per connected client
+        self._version = 0                  # last quote-cache version pushed
+        self._snapshot = None              # serialized snapshot event
+        self._pump = None
+        self.events_published = 0
+
+    # ── producer side (refresh thread) ──────────────────────────────────────
+    def publish(self, fresh=None):
+        """Refresh listener: push the symbols that changed to every client."""
+        with self._lock:
+            version, changed, removed = rt.quotes_since(self._version)
+            if version == self._version:
+                return
+            self._version = version
+            self._snapshot = None
+            if not self._clients:
+                return
+            event = delta_event(version, changed, removed)
+            self.events_published += 1
+            for q in list(self._clients):
+                self._offer(q, event)
+
+    def _offer(self, q, event):
+        """Enqueue without blocking the refresh thread; a full queue is
+        replaced by one snapshot.  Caller holds self._lock."""
+        try:
+            q.put_nowait(event)
+        except queue.Full:
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+            q.put_nowait(self._snapshot_event())
+
+    def _snapshot_event(self) -> bytes:
+        """Caller holds self._lock."""
+        if self._snapshot is None:
+            version, quotes, ts = rt.quote_snapshot()
+            self._snapshot = sse_event("snapshot", {
+                "version":    version,
+                "updated_at": _stamp(ts),
+                "count":      len(quotes),
+                "stocks":     list(quotes.values()),
+            }, event_id=version)
+        return self._snapshot
+
+    # ── consumer side (one generator per HTTP connection) ───────────────────
+    def subscribe(self, last_event_id=None):
+        """New client queue, primed with a snapshot — or, when resuming from
+        a version this process issued, with only the changes since it."""
+        q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        rt.get_all_quotes()                     # kicks a refresh if stale
+        with self._lock:
+            version = rt.quote_snapshot()[0]
+            if last_event_id is not None and 0 < last_event_id <= version:
+                _, changed, removed = rt.quotes_since(last_event_id)
+                if changed or removed:
+                    q.put_nowait(delta_event(version, changed, removed))
+            else:
+                q.put_nowait(self._snapshot_event())
+            self._clients.add(q)
+            self._ensure_pump()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._clients.discard(q)
+
+    def stream(self, last_event_id=None):
+        """Generator of SSE bytes for one client."""
+        q = self.subscribe(last_event_id)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    yield q.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield b": keep-alive\n\n"
+        finally:
+            self.unsubscribe(q)
+
+    def _ensure_pump(self):
+        """One thread per process nudges the quote cache while anyone is
+        connected, so refreshes keep happening without client polls.
+        Caller holds self._lock."""
+        if self._pump is None or not self._pump.is_alive():
+            self._pump = threading.Thread(target=self._run_pump, name="quote-stream-pump", daemon=True)
+            self._pump.start()
+
+    def _run_pump(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            with self._lock:
+                if not self._clients:
+                    self._pump = None
+                    return
+            rt.get_all_quotes()                  # non-blocking; refreshes when stale
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"clients": len(self._clients), "events_published": self.events_published}
+
+
+BROADCASTER = QuoteBroadcaster()
+rt.add_refresh_listener(BROADCASTER.publish)
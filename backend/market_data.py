@@ -0,0 +1,238 @@
+# backend/market_data.py
+"""
+Market-data providers behind realtime.py.
+
+Every download in realtime goes through provider.download(tickers, period,
+interval), which returns a yfinance-shaped DataFrame — Open / High / Low /
+Close / Volume columns, a (field, ticker) MultiIndex when a list of tickers
+is requested — so the parsing code is the same whichever provider is live.
+
+    MARKET_DATA_PROVIDER=yfinance   Yahoo Finance (default)
+    MARKET_DATA_PROVIDER=replay     replay a wide Date + tickers CSV
+                                    (REPLAY_CSV, default data/market_data.csv)
+
+The replay provider walks the CSV forward one trading day every
+REPLAY_BAR_SECONDS of wall time (0 = frozen), starting REPLAY_START rows
+before the end (or at a YYYY-MM-DD date).  Inside the current day it
+reveals a seeded intraday path from the previous close to the day's close,
+so quotes tick between refreshes and intraday / NIFTY requests have data.
+No network, and the same settings give the same prices — for load tests
+and latency benchmarks of the whole backend.
+"""
+
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import snapshot
+
+BASE_DIR = os.path.dirname(__file__)
+
+MARKET_DATA_PROVIDER = os.environ.get("MARKET_DATA_PROVIDER", "yfinance").lower()   # yfinance | replay
+REPLAY_CSV           = os.environ.get("REPLAY_CSV", os.path.join(BASE_DIR, "data", "market_data.csv"))
+REPLAY_BAR_SECONDS   = float(os.environ.get("REPLAY_BAR_SECONDS", 60))    # wall seconds per trading day
+REPLAY_START         = os.environ.get("REPLAY_START", "250")              # rows before the end, or a date
+
+INDEX_TICKER     = "^NSEI"
+FIELDS           = ["Open", "High", "Low", "Close", "Volume"]
+SESSION_OPEN     = pd.Timedelta(hours=9, minutes=15)
+SESSION_MINUTES  = 375                       # 09:15 – 15:30 IST
+INTRADAY_VOL     = 0.004                     # intraday noise around the close-to-close path
+
+
+class YFinanceProvider:
+    name = "yfinance"
+    persist_history = True               # realtime keeps daily bars in the history store
+
+    def now(self) -> pd.Timestamp:
+        return pd.Timestamp.now()
+
+    def download(self, tickers, period="1mo", interval="1d", timeout=15, **kwargs):
+        return yf.download(tickers, period=period, interval=interval, auto_adjust=True,
+                           progress=False, timeout=timeout, **kwargs)
+
+
+class ReplayProvider:
+    """Serves daily and intraday bars from a price CSV on a simulated clock.
+
+    ticker_for_column maps a CSV column to the ticker it stands for (None
+    skips the column); the index ticker is the mean of all columns, like
+    the app's CSV NIFTY fallback."""
+
+    name = "replay"
+    persist_history = False              # bars depend on the replay clock: never store them
+
+    def __init__(self, path, ticker_for_column, bar_seconds=REPLAY_BAR_SECONDS,
+                 start=REPLAY_START, clock=time.time):
+        self.path = path
+        self.bar_seconds = bar_seconds
+        self._ticker_for_column = ticker_for_column
+        self._start_spec = start
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._paths: dict = {}               # row -> (minutes × tickers) intraday path
+        self.downloads = 0
+
+    # ── data ────────────────────────────────────────────────────────────────
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            dates, columns, matrix = snapshot.parse_wide_csv(self.path)
+            ok = ~dates.isna()
+            dates, matrix = dates[ok], matrix[ok]
+            keep = [(j, self._ticker_for_column(c)) for j, c in enumerate(columns)]
+            keep = [(j, t) for j, t in keep if t]
+            tickers = [t for _, t in keep] + [INDEX_TICKER]
+            with np.errstate(invalid="ignore"):
+                index = np.nanmean(matrix, axis=1) if matrix.size else np.empty(0)
+            self.dates = dates
+            self.tickers = tickers
+            self._col = {t: k for k, t in enumerate(tickers)}
+            self.closes = np.column_stack([matrix[:, [j for j, _ in keep]], index]) if len(dates) else np.empty((0, len(tickers)))
+            self.start_row = self._resolve_start(self._start_spec)
+            self.t0 = self._clock()
+            self._loaded = True
+            print(f"[replay] {len(tickers) - 1} tickers × {len(dates)} days from {os.path.basename(self.path)}, "
+                  f"starting {dates[self.start_row].date() if len(dates) else '-'}, {self.bar_seconds:g}s per day")
+
+    def _resolve_start(self, spec) -> int:
+        n = len(self.dates)
+        if n == 0:
+            return 0
+        spec = str(spec).strip()
+        if spec.isdigit():
+            return max(n - 1 - int(spec), 0)
+        return min(int(self.dates.searchsorted(pd.Timestamp(spec))), n - 1)
+
+    def position(self) -> tuple:
+        """(current row, fraction of its session revealed)."""
+        self._load()
+        n = len(self.dates)
+        if self.bar_seconds <= 0:
+            return self.start_row, 1.0
+        steps = (self._clock() - self.t0) / self.bar_seconds
+        row = self.start_row + int(steps)
+        if row > n - 1:
+            return n - 1, 1.0                # end of the file: hold the last close
+        return row, steps - int(steps)
+
+    def now(self) -> pd.Timestamp:
+        """The replay clock's current trading day."""
+        row, _ = self.position()
+        return self.dates[row] if len(self.dates) else pd.Timestamp.now()
+
+    def _intraday_path(self, row) -> np.ndarray:
+        """(SESSION_MINUTES × tickers) minute prices from the previous close
+        to this row's close: a seeded Brownian bridge on top of the
+        geometric interpolation, so every replay of a day is identical."""
+        path = self._paths.get(row)
+        if path is None:
+            close = self.closes[row]
+            prev = self.closes[row - 1] if row > 0 else close
+            t = np.linspace(0.0, 1.0, SESSION_MINUTES + 1)[1:, None]
+            rng = np.random.default_rng(row)
+            walk = np.cumsum(rng.standard_normal((SESSION_MINUTES, len(self.tickers))), axis=0)
+            bridge = (walk - t * walk[-1]) * (INTRADAY_VOL / np.sqrt(SESSION_MINUTES))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                path = prev * (close / prev) ** t * np.exp(bridge)
+            if len(self._paths) >= 8:
+                self._paths.clear()
+            self._paths[row] = path
+        return path
+
+    # ── provider API ────────────────────────────────────────────────────────
+    def download(self, tickers, period="1mo", interval="1d", **kwargs):
+        self._load()
+        self.downloads += 1
+        names = [tickers] if isinstance(tickers, str) else list(tickers)
+        cols = [self._col[t] for t in names if t in self._col]
+        if not cols or not len(self.dates):
+            return pd.DataFrame()
+        row, frac = self.position()
+        minutes = max(int(frac * SESSION_MINUTES), 1)
+        today = self._intraday_path(row)[:minutes, cols]
+
+        if interval.endswith("d") or interval in ("1wk", "1mo"):
+            first = self._period_start(row, period)
+            close = self.closes[first:row + 1, cols].copy()
+            close[-1] = today[-1]
+            prev = np.vstack([self.closes[max(first - 1, 0), cols], close[:-1]])
+            high, low = np.maximum(prev, close), np.minimum(prev, close)
+            high[-1] = np.maximum(prev[-1], today.max(axis=0))
+            low[-1]  = np.minimum(prev[-1], today.min(axis=0))
+            bars = {"Open": prev, "High": high, "Low": low, "Close": close}
+            index = self.dates[first:row + 1]
+        else:
+            step = _interval_minutes(interval)
+            starts = np.arange(0, minutes, step)
+            prev = self.closes[row - 1, cols] if row > 0 else today[0]
+            opens = np.vstack([prev, today[starts[1:] - 1]])
+            bars = {
+                "Open":  opens,
+                "High":  np.maximum(np.maximum.reduceat(today, starts, axis=0), opens),
+                "Low":   np.minimum(np.minimum.reduceat(today, starts, axis=0), opens),
+                "Close": today[np.minimum(starts + step, minutes) - 1],
+            }
+            index = pd.DatetimeIndex(self.dates[row] + SESSION_OPEN + pd.to_timedelta(starts, unit="m"))
+        bars["Volume"] = np.zeros_like(bars["Close"])
+
+        picked = [self.tickers[c] for c in cols]
+        if isinstance(tickers, str):
+            return pd.DataFrame({f: bars[f][:, 0] for f in FIELDS}, index=index)
+        return pd.DataFrame(np.hstack([bars[f] for f in FIELDS]), index=index,
+                            columns=pd.MultiIndex.from_product([FIELDS, picked], names=["Price", "Ticker"]))
+
+    def _period_start(self, row, period) -> int:
+        """First row of a yfinance-style period ending at row."""
+        start = period_start(self.dates[row], period)
+        return 0 if start is None else int(self.dates.searchsorted(start))
+
+    def stats(self) -> dict:
+        row, frac = self.position()
+        return {
+            "provider":    self.name,
+            "date":        self.dates[row].strftime("%Y-%m-%d") if len(self.dates) else None,
+            "session_pct": round(frac * 100, 1),
+            "bar_seconds": self.bar_seconds,
+            "downloads":   self.downloads,
+        }
+
+
+def period_start(anchor, period):
+    """First date of a yfinance-style period ending at `anchor` ("5d" counts
+    business days, "1wk" / "3mo" / "1y" calendar time, "ytd" from Jan 1);
+    None for "max" or anything unrecognised."""
+    anchor = pd.Timestamp(anchor).normalize()
+    if period == "ytd":
+        return anchor.replace(month=1, day=1)
+    m = re.fullmatch(r"(\d+)(d|wk|mo|y)", period or "")
+    if not m:
+        return None
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        return anchor - pd.offsets.BDay(max(n - 1, 0))
+    offset = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+    return anchor - offset + pd.Timedelta(days=1)
+
+
+def _interval_minutes(interval) -> int:
+    m = re.fullmatch(r"(\d+)(m|h)", interval or "")
+    if not m:
+        return 5
+    return int(m.group(1)) * (60 if m.group(2) == "h" else 1)
+
+
+def from_env(ticker_for_column, name=MARKET_DATA_PROVIDER):
+    """Provider selected by MARKET_DATA_PROVIDER."""
+    if name == "replay":
+        return ReplayProvider(REPLAY_CSV, ticker_for_column)
+    if name != "yfinance":
+        print(f"[market-data] Unknown MARKET_DATA_PROVIDER={name!r}, using yfinance")
+    return YFinanceProvider()
@@ -0,0 +1,118 @@
+# backend/news_stub.py
+"""
+Local stand-in for the newsdata.io API, for load tests and manual offline
+runs (there is no automated test suite behind it).
+
+    python -m news_stub [--port 8765] [--latency 0.5] [--error-status 429]
+    NEWS_API_URL=http://127.0.0.1:8765/api/1/news python app.py
+
+Answers GET /api/1/news?q=<keyword> with newsdata.io-shaped JSON built from
+data/sentiment_sample.csv (headlines whose text mentions the keyword), after
+an optional artificial latency.  With --error-status it answers every news
+request with that HTTP status and a newsdata.io error payload instead, to
+exercise the app's error / stale path.  GET /stats returns how many news
+requests were served, which shows how many calls the sentiment cache let
+through.
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "data", "sentiment_sample.csv")
+
+
+def load_headlines(path=SAMPLE_CSV) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["headline"] for row in csv.DictReader(f) if row.get("headline")]
+
+
+def matching_articles(headlines, keyword, limit=10) -> list:
+    words = [w.lower() for w in keyword.split() if len(w) > 2] or [keyword.lower()]
+    hits = [h for h in headlines if any(w in h.lower() for w in words)]
+    return [
+        {"title": h, "description": "", "pubDate": time.strftime("%Y-%m-%d %H:%M:%S")}
+        for h in hits[:limit]
+    ]
+
+
+class NewsStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, latency=0.0, headlines=None, error_status=None):
+        super().__init__(addr, _Handler)
+        self.latency = latency
+        self.error_status = error_status
+        self.headlines = headlines if headlines is not None else load_headlines()
+        self.requests_served = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/1/news"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/stats":
+            return self._send({"requests": self.server.requests_served})
+        if parsed.path != "/api/1/news":
+            return self._send({"status": "error", "message": "not found"}, 404)
+        with self.server._count_lock:
+            self.server.requests_served += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.error_status:
+            return self._send({"status": "error",
+                               "results": {"message": "stubbed error", "code": "RateLimitExceeded"}},
+                              self.server.error_status)
+        keyword = parse_qs(parsed.query).get("q", [""])[0]
+        results = matching_articles(self.server.headlines, keyword)
+        self._send({"status": "success", "totalResults": len(results), "results": results})
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(port=0, latency=0.0, host="127.0.0.1", error_status=None) -> NewsStub:
+    """Start the stub on a background thread and return it (port=0 → any free
+    port; see .url).  Call .shutdown() to stop."""
+    server = NewsStub((host, port), latency=latency, error_status=error_status)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in newsdata.io server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each news request")
+    parser.add_argument("--error-status", type=int, default=None,
+                        help="answer news requests with this HTTP status and an error payload")
+    args = parser.parse_args(argv)
+
+    server = NewsStub((args.host, args.port), latency=args.latency, error_status=args.error_status)
+    print(f"[news-stub] {len(server.headlines)} headlines at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
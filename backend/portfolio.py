@@ -0,0 +1,399 @@
+# backend/portfolio.py
+"""
+Vectorized portfolio valuation.
+
+HoldingsBook holds every position of every portfolio (data/holdings.csv)
+in flat arrays and keeps per-portfolio totals as running sums.  A quote
+refresh reprices only the positions of the symbols whose quote changed, so
+valuation scales with the number of changed quotes, not with the number
+of positions.  Starting prices for symbols without a live quote come from
+the CSV's last / previous rows (PriceBasis, computed once per price
+matrix).
+
+valuate_batch() values any number of ad-hoc portfolios against one quote
+snapshot with a sparse positions × symbols matrix multiply.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import realtime as rt
+
+
+class PriceBasis:
+    """First, last and previous-row prices for every column of a
+    (rows × symbols) matrix, plus the clean symbol for each column."""
+
+    def __init__(self, matrix, columns):
+        prices = np.asarray(matrix, dtype=np.float64)
+        valid = ~np.isnan(prices)
+        cols = np.arange(prices.shape[1])
+        self.matrix   = matrix
+        self.columns  = list(columns)
+        self.symbols  = [rt.resolve(c) for c in self.columns]
+        self.has_data = valid.any(axis=0)
+        self.first    = prices[valid.argmax(axis=0), cols] if len(prices) else np.full(len(cols), np.nan)
+        self.last     = prices[-1] if len(prices) else np.full(len(cols), np.nan)
+        self.prev     = prices[-2] if len(prices) >= 2 else self.last
+        self._col     = {**{c: j for j, c in enumerate(self.columns)},
+                         **{s: j for j, s in enumerate(self.symbols) if s}}
+
+    def closes_for(self, symbols) -> tuple:
+        """(last, previous) CSV close per symbol (clean symbol or CSV column);
+        NaN where the CSV has no price, previous falls back to last."""
+        k = np.array([self._col.get(s, self._col.get(rt.resolve(s), -1)) for s in symbols], dtype=np.int64)
+        last = np.where(k >= 0, self.last[k], np.nan)
+        prev = np.where(k >= 0, self.prev[k], np.nan)
+        return last, np.where(np.isfinite(prev), prev, last)
+
+
+def valuate(quantity, avg_cost, ltp, prev_close) -> dict:
+    """Per-holding values (rounded to 2 dp) for aligned vectors."""
+    invested = quantity * avg_cost
+    current  = quantity * ltp
+    pl = current - invested
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pl_pct = np.where(invested != 0, pl / invested * 100, 0.0)
+    return {
+        "invested":        np.round(invested, 2),
+        "current_value":   np.round(current, 2),
+        "profit_loss":     np.round(pl, 2),
+        "profit_loss_pct": np.round(pl_pct, 2),
+        "today_pl":        np.round(quantity * (ltp - prev_close), 2),
+    }
+
+
+# ── Holdings book: positions from holdings.csv, repriced incrementally ─────
+DEFAULT_PORTFOLIO = "default"
+
+
+def read_lots(path_or_buffer, rejected=None) -> pd.DataFrame:
+    """Lots CSV → DataFrame[portfolio, symbol, quantity, avg_cost].
+
+        portfolio,symbol,quantity,avg_cost     (portfolio is optional)
+
+    One row per lot; rows without a symbol, with a non-numeric quantity /
+    avg_cost, a non-positive quantity or a negative avg_cost are dropped
+    and, if a `rejected` list is given, appended to it as {portfolio, row,
+    symbol, reason}.  `row` is 1-based and counts lots, not file lines:
+    row 1 is the first line after the header."""
+    df = pd.read_csv(path_or_buffer, dtype={"portfolio": str, "symbol": str})
+    df.columns = [c.strip().lower() for c in df.columns]
+    df["row"] = np.arange(1, len(df) + 1)          # header not counted
+    return _clean_lots(df, rejected)
+
+
+def lots_from_json(payload, rejected=None) -> pd.DataFrame:
+    """{"portfolios": [{"portfolio": id, "holdings": [{symbol, quantity,
+    avg_cost}, ...]}, ...]} (or just the list) → the read_lots() frame.
+    Invalid holdings go to `rejected` as in read_lots(), with row = their
+    1-based position in the portfolio's holdings list."""
+    portfolios = payload.get("portfolios") if isinstance(payload, dict) else payload
+    if not isinstance(portfolios, list):
+        raise ValueError("expected a list of portfolios")
+    rows = []
+    for k, p in enumerate(portfolios):
+        if not isinstance(p, dict) or not isinstance(p.get("holdings"), list):
+            raise ValueError(f"portfolio #{k} has no holdings list")
+        name = str(p.get("portfolio", p.get("id", k)))
+        for j, h in enumerate(p["holdings"]):
+            rows.append({**h, "portfolio": name, "row": j + 1} if isinstance(h, dict)
+                        else {"portfolio": name, "row": j + 1})
+    return _clean_lots(pd.DataFrame(rows, columns=["portfolio", "symbol", "quantity", "avg_cost", "row"]),
+                       rejected)
+
+
+def _clean_lots(df, rejected=None) -> pd.DataFrame:
+    missing = {"symbol", "quantity", "avg_cost"} - set(df.columns)
+    if missing:
+        raise ValueError(f"holdings are missing column(s): {', '.join(sorted(missing))}")
+    if "portfolio" not in df.columns:
+        df["portfolio"] = DEFAULT_PORTFOLIO
+    df["portfolio"] = df["portfolio"].fillna(DEFAULT_PORTFOLIO).astype(str).str.strip()
+    df["symbol"]    = df["symbol"].fillna("").astype(str).str.strip()
+    df["quantity"]  = pd.to_numeric(df["quantity"], errors="coerce")
+    df["avg_cost"]  = pd.to_numeric(df["avg_cost"], errors="coerce")
+    reason = np.select(
+        [df["symbol"].eq(""), df["quantity"].isna(), df["avg_cost"].isna(), ~(df["quantity"] > 0),
+         df["avg_cost"] < 0],
+        ["missing symbol", "non-numeric quantity", "non-numeric avg_cost", "non-positive quantity",
+         "negative avg_cost"],
+        default="",
+    )
+    bad = reason != ""
+    if rejected is not None and bad.any():
+        rows = df["row"].tolist() if "row" in df.columns else [None] * len(df)
+        rejected.extend(
+            {"portfolio": df["portfolio"].iat[i], "row": rows[i], "symbol": df["symbol"].iat[i] or None,
+             "reason": str(reason[i])}
+            for i in np.flatnonzero(bad).tolist()
+        )
+    return df[~bad][["portfolio", "symbol", "quantity", "avg_cost"]]
+
+
+def _group(codes, n) -> list:
+    """Positions of each code 0..n-1 as index arrays (stable order)."""
+    order = np.argsort(codes, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(codes, minlength=n))[:-1])
+
+
+class HoldingsBook:
+    """
+    Every position of every portfolio in flat arrays (one entry per
+    portfolio × symbol; lots are merged at their weighted average cost),
+    with per-portfolio invested / value / today's P&L kept as running sums.
+
+    apply_quotes() reprices only the positions of the symbols whose quote
+    changed and adds the deltas to the sums, so a refresh costs
+    O(positions in changed symbols) however many portfolios are loaded.
+    """
+
+    def __init__(self, lots, basis=None, source=None):
+        """lots: DataFrame from read_lots().  basis: PriceBasis used for the
+        starting prices (CSV last / previous close) before any live quote;
+        positions the CSV doesn't cover start at their average cost."""
+        lots = lots.assign(cost=lots["quantity"] * lots["avg_cost"])
+        pos = (lots.groupby(["portfolio", "symbol"], sort=False)
+                   .agg(quantity=("quantity", "sum"), cost=("cost", "sum"), lots=("cost", "size"))
+                   .reset_index())
+        self.source     = source
+        self.portfolios = list(dict.fromkeys(pos["portfolio"]))
+        self._pidx      = {p: i for i, p in enumerate(self.portfolios)}
+        self.port       = pos["portfolio"].map(self._pidx).to_numpy(dtype=np.int64)
+        self.symbols    = pos["symbol"].tolist()                 # as written in the file
+        self.quantity   = pos["quantity"].to_numpy(dtype=np.float64)
+        self.invested   = pos["cost"].to_numpy(dtype=np.float64)
+        self.lots       = pos["lots"].to_numpy(dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.avg_cost = self.invested / self.quantity
+
+        # per distinct symbol: clean symbol, sector, CSV column; positions
+        # point at them through self.sym (index into self.universe)
+        raw_codes, raw = pd.factorize(pos["symbol"])
+        clean = [rt.resolve(s) or s for s in raw]
+        clean_codes, self.universe = pd.factorize(pd.Series(clean, dtype=object))
+        self.universe = list(self.universe)
+        self.sectors  = [rt.STOCKS.get(c, {}).get("sector", "Other") for c in self.universe]
+        self.sym      = clean_codes[raw_codes]
+        self._sidx    = {s: i for i, s in enumerate(self.universe)}
+        self._by_symbol = _group(self.sym, len(self.universe))
+        self._by_port   = _group(self.port, len(self.portfolios))
+
+        # starting (fallback) prices: CSV last / previous row, else average cost
+        self.base_ltp  = self.avg_cost.copy()
+        self.base_prev = self.avg_cost.copy()
+        self.base_csv  = np.zeros(len(self.symbols), dtype=bool)
+        if basis is not None:
+            last, prev = basis.closes_for(raw)
+            last, prev = last[raw_codes], prev[raw_codes]
+            self.base_csv  = np.isfinite(last)
+            self.base_ltp  = np.where(self.base_csv, last, self.base_ltp)
+            self.base_prev = np.where(self.base_csv, prev, self.base_prev)
+
+        self._lock = threading.Lock()
+        self.version = 0                      # quote-cache version applied
+        self.repriced = 0                     # positions repriced since load
+        self.ltp    = self.base_ltp.copy()
+        self.prev   = self.base_prev.copy()
+        self.live   = np.zeros(len(self.symbols), dtype=bool)
+        self.value  = self.quantity * self.ltp
+        self.today  = self.quantity * (self.ltp - self.prev)
+        n = len(self.portfolios)
+        self.agg_invested = np.bincount(self.port, self.invested, minlength=n)
+        self.agg_value    = np.bincount(self.port, self.value, minlength=n)
+        self.agg_today    = np.bincount(self.port, self.today, minlength=n)
+
+    @classmethod
+    def synthetic(cls, basis) -> "HoldingsBook":
+        """One share of every CSV symbol bought at its first price — the
+        demo portfolio served when there is no holdings.csv."""
+        keep = np.flatnonzero(basis.has_data)
+        lots = pd.DataFrame({
+            "portfolio": DEFAULT_PORTFOLIO,
+            "symbol":    [basis.columns[j] for j in keep],
+            "quantity":  1.0,
+            "avg_cost":  basis.first[keep],
+        })
+        return cls(lots, basis)
+
+    # ── updates (refresh thread) ──────────────────────────────────────────
+    def apply_quotes(self, version, changed, removed=()) -> int:
+        """Reprice the positions of changed symbols (removed symbols go back
+        to their starting prices).  Returns the number of positions touched."""
+        parts, ltps, prevs, live = [], [], [], []
+        for sym, q in changed.items():
+            i = self._sidx.get(sym)
+            if i is not None and q.get("ltp") is not None:
+                js = self._by_symbol[i]
+                parts.append(js)
+                ltps.append(np.full(len(js), float(q["ltp"])))
+                prevs.append(np.full(len(js), float(q.get("prev_close") or q["ltp"])))
+                live.append(np.ones(len(js), dtype=bool))
+        for sym in removed:
+            i = self._sidx.get(sym)
+            if i is not None:
+                js = self._by_symbol[i]
+                parts.append(js)
+                ltps.append(self.base_ltp[js])
+                prevs.append(self.base_prev[js])
+                live.append(np.zeros(len(js), dtype=bool))
+
+        with self._lock:
+            self.version = max(self.version, version)
+            if not parts:
+                return 0
+            js = np.concatenate(parts)
+            ltp, prev = np.concatenate(ltps), np.concatenate(prevs)
+            value = self.quantity[js] * ltp
+            today = self.quantity[js] * (ltp - prev)
+            np.add.at(self.agg_value, self.port[js], value - self.value[js])
+            np.add.at(self.agg_today, self.port[js], today - self.today[js])
+            self.ltp[js], self.prev[js], self.value[js], self.today[js] = ltp, prev, value, today
+            self.live[js] = np.concatenate(live)
+            self.repriced += len(js)
+            return len(js)
+
+    # ── reads ─────────────────────────────────────────────────────────────
+    def totals(self, portfolio=DEFAULT_PORTFOLIO) -> dict | None:
+        """Totals of one portfolio from the running sums (None if unknown)."""
+        i = self._pidx.get(portfolio)
+        if i is None:
+            return None
+        with self._lock:
+            invested, value, today = self.agg_invested[i], self.agg_value[i], self.agg_today[i]
+        return {
+            "total_invested":      round(float(invested), 2),
+            "total_current_value": round(float(value), 2),
+            "total_profit_loss":   round(float(value - invested), 2),
+            "total_today_pl":      round(float(today), 2),
+        }
+
+    def holdings(self, portfolio=DEFAULT_PORTFOLIO) -> list | None:
+        """Per-position rows of one portfolio (None if unknown)."""
+        i = self._pidx.get(portfolio)
+        if i is None:
+            return None
+        js = self._by_port[i]
+        with self._lock:
+            ltp, prev, live = self.ltp[js], self.prev[js], self.live[js]
+        values = valuate(self.quantity[js], self.avg_cost[js], ltp, prev)
+        cols = {k: v.tolist() for k, v in values.items()}
+        qty, cost, ltps = self.quantity[js].tolist(), np.round(self.avg_cost[js], 2).tolist(), np.round(ltp, 2).tolist()
+        return [
+            {
+                "symbol":          self.symbols[j],
+                "quantity":        int(qty[k]) if qty[k].is_integer() else qty[k],
+                "lots":            int(self.lots[j]),
+                "avg_cost":        cost[k],
+                "ltp":             ltps[k],
+                "invested":        cols["invested"][k],
+                "current_value":   cols["current_value"][k],
+                "profit_loss":     cols["profit_loss"][k],
+                "profit_loss_pct": cols["profit_loss_pct"][k],
+                "today_pl":        cols["today_pl"][k],
+                "source":          "live" if live[k] else ("csv" if self.base_csv[j] else "cost"),
+            }
+            for k, j in enumerate(js)
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "source":     self.source,
+                "portfolios": len(self.portfolios),
+                "positions":  len(self.symbols),
+                "version":    self.version,
+                "repriced":   self.repriced,
+            }
+
+
+# ── Batch valuation: many portfolios, one snapshot, one sparse multiply ────
+def valuate_batch(lots, quotes, basis=None, rejected=()) -> dict:
+    """
+    Value every portfolio in `lots` (read_lots() frame) against one quote
+    snapshot.  Positions become a sparse (portfolios × symbols) quantity
+    matrix Q, so current value, today's P&L and per-sector exposure are
+    Q @ prices, Q @ day-change and (Q · diag(prices)) @ sectors.  Symbols
+    with neither a live quote nor a CSV price are valued at cost and listed
+    under "unpriced".  `rejected` rows (from read_lots / lots_from_json)
+    are reported under each portfolio's "errors"; a portfolio whose rows
+    were all rejected is still listed, with zero totals.
+    """
+    errors: dict = {}
+    for r in rejected:
+        errors.setdefault(r["portfolio"], []).append({k: v for k, v in r.items() if k != "portfolio"})
+    port, names = pd.factorize(lots["portfolio"])
+    raw_codes, raw = pd.factorize(lots["symbol"])
+    sym_of_raw, universe = pd.factorize(pd.Series([rt.resolve(s) or s for s in raw], dtype=object))
+    sym = sym_of_raw[raw_codes]
+    n_p, n_s = len(names), len(universe)
+    qty  = lots["quantity"].to_numpy(dtype=np.float64)
+    cost = qty * lots["avg_cost"].to_numpy(dtype=np.float64)
+
+    # one price per distinct symbol: live quote, else CSV last / previous
+    if basis is not None:
+        ltp, prev = basis.closes_for(list(universe))
+    else:
+        ltp, prev = np.full(n_s, np.nan), np.full(n_s, np.nan)
+    live = np.zeros(n_s, dtype=bool)
+    for i, s in enumerate(universe):
+        q = quotes.get(s)
+        if q and q.get("ltp") is not None:
+            ltp[i], prev[i], live[i] = q["ltp"], q.get("prev_close") or q["ltp"], True
+    priced = np.isfinite(ltp)
+    px   = np.where(priced, ltp, 0.0)
+    move = np.where(priced, ltp - prev, 0.0)
+
+    Q = sparse.csr_matrix((qty, (port, sym)), shape=(n_p, n_s))
+    C = sparse.csr_matrix((cost, (port, sym)), shape=(n_p, n_s))
+    Q.sum_duplicates()
+    positions = np.diff(Q.indptr)
+    invested  = np.bincount(port, cost, minlength=n_p)
+    held      = Q @ sparse.diags(px) + C @ sparse.diags((~priced).astype(np.float64))
+    value     = np.asarray(held.sum(axis=1)).ravel()
+    today     = Q @ move
+
+    sector_codes, sectors = pd.factorize(pd.Series(
+        [rt.STOCKS.get(s, {}).get("sector", "Other") for s in universe], dtype=object))
+    S = sparse.csr_matrix((np.ones(n_s), (np.arange(n_s), sector_codes)), shape=(n_s, len(sectors)))
+    exposure = (held @ S).toarray()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pl = value - invested
+        pl_pct = np.where(invested != 0, pl / invested * 100, 0.0)
+        weights = np.where(value[:, None] != 0, exposure / value[:, None] * 100, 0.0)
+    invested, value, pl, pl_pct, today = (np.round(a, 2).tolist() for a in (invested, value, pl, pl_pct, today))
+    nonzero = exposure != 0
+    exposure, weights = np.round(exposure, 2).tolist(), np.round(weights, 2).tolist()
+    sectors, names = list(sectors), list(names)
+
+    results = []
+    for i, name in enumerate(names):
+        results.append({
+            "portfolio":             name,
+            "positions":             int(positions[i]),
+            "total_invested":        invested[i],
+            "total_current_value":   value[i],
+            "total_profit_loss":     pl[i],
+            "total_profit_loss_pct": pl_pct[i],
+            "total_today_pl":        today[i],
+            "sector_exposure":       {sectors[k]: {"value": exposure[i][k], "weight_pct": weights[i][k]}
+                                      for k in np.flatnonzero(nonzero[i]).tolist()},
+            "errors":                errors.pop(name, []),
+        })
+    for name, errs in errors.items():           # every row rejected
+        results.append({
+            "portfolio": name, "positions": 0,
+            "total_invested": 0.0, "total_current_value": 0.0, "total_profit_loss": 0.0,
+            "total_profit_loss_pct": 0.0, "total_today_pl": 0.0,
+            "sector_exposure": {}, "errors": errs,
+        })
+    return {
+        "portfolios": results,
+        "symbols":    n_s,
+        "live":       int(live.sum()),
+        "unpriced":   [universe[i] for i in np.flatnonzero(~priced)],
+    }
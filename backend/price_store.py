@@ -0,0 +1,150 @@
+# backend/price_store.py
+"""
+Process-wide store for the historical price matrix (market_data.csv).
+The wide CSV is parsed once into a Date index plus a float64 matrix and is
+only re-parsed when the file's mtime changes.  Callers get zero-copy views.
+
+When a snapshot directory is configured the matrix is memory-mapped from the
+columnar snapshot (see snapshot.py) instead, so workers share page cache.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import realtime as rt
+import snapshot
+
+
+class PriceStore:
+    """Date vector + (rows × symbols) float64 matrix for one wide CSV.
+
+    The matrix is stored column-major (Fortran order) so every per-symbol
+    column is a contiguous, read-only view — no copy is made per request."""
+
+    def __init__(self, path: str, snapshot_dir: str | None = None):
+        self.path = path
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._dates = pd.DatetimeIndex([])
+        self._columns: list = []
+        self._col_index: dict = {}
+        self._matrix = np.empty((0, 0), dtype=np.float64, order="F")
+        self._frame = pd.DataFrame()
+        self.source = None
+
+    # ── loading ──────────────────────────────────────────────────────────
+    def _load(self, mtime):
+        if self.snapshot_dir and self._load_snapshot(mtime):
+            return
+        dates, columns, matrix = snapshot.parse_wide_csv(self.path)
+        if self.snapshot_dir and columns:
+            # Compile once so the next load (or the next worker) can mmap it
+            try:
+                snapshot.write_snapshot(self.snapshot_dir, dates, columns, matrix, source_mtime=mtime)
+                if self._load_snapshot(mtime):
+                    return
+            except Exception as e:
+                print(f"[prices] Snapshot write failed: {e}")
+        self._set(dates, columns, matrix, mtime)
+
+    def _load_snapshot(self, mtime) -> bool:
+        meta = snapshot.read_meta(self.snapshot_dir)
+        if meta is None or meta.get("source_mtime") != mtime:
+            return False
+        loaded = snapshot.load_snapshot(self.snapshot_dir)
+        if loaded is None:
+            return False
+        dates, columns, matrix, _ = loaded
+        self._set(dates, columns, matrix, mtime, source="snapshot")
+        return True
+
+    def _set(self, dates, columns, matrix, mtime, source="csv"):
+        # Keep float32 snapshots as-is — converting would copy the mapping
+        dtype  = matrix.dtype if np.issubdtype(matrix.dtype, np.floating) else np.float64
+        matrix = np.asfortranarray(matrix, dtype=dtype)
+        matrix.flags.writeable = False
+        frame = pd.DataFrame(matrix, columns=columns, copy=False)
+        frame.insert(0, "Date", dates)
+
+        self._dates     = dates
+        self._columns   = list(columns)
+        self._col_index = {c: i for i, c in enumerate(columns)}
+        self._matrix    = matrix
+        self._frame     = frame
+        self._mtime     = mtime
+        self.source     = source
+        print(f"[prices] Loaded {matrix.shape[0]} rows × {matrix.shape[1]} symbols from {source}")
+
+    def refresh(self) -> bool:
+        """Reload if the file changed on disk.  Returns False if it is missing."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return True
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    self._load(mtime)
+                except Exception as e:
+                    print(f"[prices] Failed to load {self.path}: {e}")
+                    return self._mtime is not None
+        return True
+
+    # ── accessors (all zero-copy) ────────────────────────────────────────
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        self.refresh()
+        return self._dates
+
+    @property
+    def columns(self) -> list:
+        self.refresh()
+        return self._columns
+
+    @property
+    def matrix(self) -> np.ndarray:
+        self.refresh()
+        return self._matrix
+
+    def column_for(self, symbol: str) -> str | None:
+        """CSV column name for a clean symbol or raw CSV column, if present."""
+        self.refresh()
+        if symbol in self._col_index:
+            return symbol
+        clean = rt.resolve(symbol) or symbol
+        for csv_col, clean_sym in rt.CSV_TO_SYMBOL.items():
+            if clean_sym == clean and csv_col in self._col_index:
+                return csv_col
+        return None
+
+    def column(self, col: str) -> np.ndarray | None:
+        """Read-only view of one symbol's prices (aligned with `dates`)."""
+        self.refresh()
+        j = self._col_index.get(col)
+        return None if j is None else self._matrix[:, j]
+
+    def frame(self) -> pd.DataFrame:
+        """Date + one column per symbol.  Shallow copy: callers may add or
+        drop columns freely, the underlying matrix is shared and read-only."""
+        if not self.refresh():
+            return pd.DataFrame()
+        return self._frame.copy(deep=False)
+
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str, snapshot_dir: str | None = None) -> PriceStore:
+    """Shared PriceStore for `path` (one per process)."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = PriceStore(path, snapshot_dir)
+        return store
@@ -3,12 +3,19 @@
 Real-time data layer using yfinance.
 All stocks are identified by their clean Yahoo Finance ticker (e.g. RELIANCE.NS).
 Display names are human-readable (e.g. "Reliance Industries").
+Downloads go through a pluggable provider (market_data.py): yfinance, or a
+local CSV replay selected with MARKET_DATA_PROVIDER=replay.  Daily history
+is kept on disk (history_store.py) and only its missing tail is downloaded.
 """
 
-import yfinance as yf
+import os
 import pandas as pd
 import threading
 import time
+from types import MappingProxyType
+
+import history_store
+import market_data
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  Master stock registry
@@ -114,6 +121,26 @@ def get_display_name(symbol: str) -> str:
     return symbol
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+#  Market-data provider (yfinance by default; see market_data.py)
+# ─────────────────────────────────────────────────────────────────────────────
+def _ticker_for_column(column: str) -> str | None:
+    """Ticker a legacy CSV column stands for (IT_TCS → TCS.NS)."""
+    clean = resolve(column) or resolve(column.split("_", 1)[-1])
+    return STOCKS[clean]["yf"] if clean else None
+
+
+PROVIDER = market_data.from_env(_ticker_for_column)
+
+
+def set_provider(provider):
+    """Swap the market-data provider (tests, benchmarks).  The quote cache
+    is marked stale so the next read refreshes from the new provider."""
+    global PROVIDER, _cache_ts
+    PROVIDER = provider
+    _cache_ts = 0.0
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  In-memory quote cache  (NON-BLOCKING design)
 #
@@ -124,20 +151,55 @@ def get_display_name(symbol: str) -> str:
 #  • yf.download is wrapped in a hard timeout via a daemon thread so even
 #    if yfinance hangs, the refresh thread is not stuck forever.
 # ─────────────────────────────────────────────────────────────────────────────
-LIVE_CACHE_TTL = 300          # 5 minutes — avoids hammering yfinance
+LIVE_CACHE_TTL = int(os.environ.get("LIVE_CACHE_TTL", 300))   # 5 minutes — avoids hammering yfinance
 _quote_cache: dict = {}
 _cache_ts: float  = 0.0
 _cache_lock = threading.Lock()        # protects _quote_cache / _cache_ts
 _refreshing = False                   # True while a background refresh is in progress
+_refresh_listeners: list = []         # callables notified with each fresh quote dict
+
+# Every cache replacement that changes anything bumps _cache_version, and
+# each symbol remembers the version in which its quote last changed (or
+# disappeared) — enough to answer "what changed since version N" and to
+# derive ETags.  A published dict is never mutated afterwards, so readers
+# get a read-only view of it instead of a copy.
+_cache_version: int = 0
+_version_ts: float = 0.0              # when _cache_version was published
+_symbol_versions: dict = {}           # symbol -> version of its last change
+
+
+def add_refresh_listener(fn):
+    """Register fn(quotes) to run after every successful cache replacement.
+    Listeners run on the refresh thread, so they should be quick."""
+    if fn not in _refresh_listeners:
+        _refresh_listeners.append(fn)
+
+
+def _publish(fresh: dict):
+    """Swap in a freshly fetched quote dict and notify listeners."""
+    global _quote_cache, _cache_ts, _cache_version, _version_ts
+    with _cache_lock:
+        version = _cache_version + 1
+        changed = [sym for sym, q in fresh.items() if _quote_cache.get(sym) != q]
+        changed += [sym for sym in _quote_cache if sym not in fresh]
+        for sym in changed:
+            _symbol_versions[sym] = version
+        _quote_cache = fresh
+        _cache_ts = time.time()
+        if changed:
+            _cache_version = version
+            _version_ts = _cache_ts
+    for fn in list(_refresh_listeners):
+        try:
+            fn(fresh)
+        except Exception as e:
+            print(f"[realtime] Refresh listener {getattr(fn, '__name__', fn)} failed: {e}")
 
 
 def _download_with_timeout(tickers, timeout_secs=30, **kwargs):
-    """Run yf.download in a daemon thread with a hard wall-clock timeout.
-    Extra kwargs are forwarded to yf.download (period, interval, etc.)."""
-    dl_kwargs = dict(
-        period="2d", interval="1d",
-        auto_adjust=True, progress=False, threads=True, timeout=15,
-    )
+    """Run a provider download in a daemon thread with a hard wall-clock
+    timeout.  Extra kwargs are forwarded to it (period, interval, etc.)."""
+    dl_kwargs = dict(period="2d", interval="1d", timeout=15)
     dl_kwargs.update(kwargs)  # caller can override period, interval, etc.
 
     result = [None]
@@ -145,7 +207,7 @@ def _download_with_timeout(tickers, timeout_secs=30, **kwargs):
 
     def worker():
         try:
-            result[0] = yf.download(tickers, **dl_kwargs)
+            result[0] = PROVIDER.download(tickers, **dl_kwargs)
         except Exception as e:
             err[0] = e
 
@@ -153,10 +215,10 @@ def _download_with_timeout(tickers, timeout_secs=30, **kwargs):
     t.start()
     t.join(timeout=timeout_secs)
     if t.is_alive():
-        print(f"[realtime] yf.download HARD TIMEOUT ({timeout_secs}s) — returning empty")
+        print(f"[realtime] download HARD TIMEOUT ({timeout_secs}s) — returning empty")
         return pd.DataFrame()
     if err[0]:
-        print(f"[realtime] yf.download error: {err[0]}")
+        print(f"[realtime] download error: {err[0]}")
         return pd.DataFrame()
     return result[0] if result[0] is not None else pd.DataFrame()
 
@@ -210,6 +272,7 @@ def _parse_quotes_from_df(raw, syms_to_check) -> dict:
                 "high":       round(float(high_s.iloc[-1]),  2) if not high_s.empty else None,
                 "low":        round(float(low_s.iloc[-1]),   2) if not low_s.empty else None,
                 "volume":     int(vol_s.iloc[-1]) if not vol_s.empty and not pd.isna(vol_s.iloc[-1]) else 0,
+                "date":       close_s.index[-1].strftime("%Y-%m-%d"),
                 "source":     "live",
             }
         except Exception:
@@ -254,13 +317,11 @@ def _fetch_all_quotes() -> dict:
 
 def _background_refresh():
     """Run the actual fetch and update the cache. Called from a background thread."""
-    global _quote_cache, _cache_ts, _refreshing
+    global _refreshing
     try:
         fresh = _fetch_all_quotes()
         if fresh:
-            with _cache_lock:
-                _quote_cache = fresh
-                _cache_ts = time.time()
+            _publish(fresh)
             print(f"[realtime] Refreshed {len(fresh)} live quotes.")
     except Exception as e:
         print(f"[realtime] Background refresh error: {e}")
@@ -282,7 +343,24 @@ def get_all_quotes(force_refresh=False) -> dict:
         threading.Thread(target=_background_refresh, daemon=True).start()
 
     with _cache_lock:
-        return dict(_quote_cache)
+        return MappingProxyType(_quote_cache)
+
+
+def quote_snapshot() -> tuple:
+    """(version, read-only quotes, time the version was published), taken
+    atomically."""
+    with _cache_lock:
+        return _cache_version, MappingProxyType(_quote_cache), _version_ts
+
+
+def quotes_since(version: int) -> tuple:
+    """(current version, {symbol: quote} changed after `version`, [removed
+    symbols]).  version=0 returns everything."""
+    with _cache_lock:
+        syms = [sym for sym, v in _symbol_versions.items() if v > version]
+        changed = {sym: _quote_cache[sym] for sym in syms if sym in _quote_cache}
+        removed = [sym for sym in syms if sym not in _quote_cache]
+        return _cache_version, changed, removed
 
 
 def get_quote(symbol: str) -> dict | None:
@@ -293,55 +371,121 @@ def get_quote(symbol: str) -> dict | None:
     return quotes.get(clean)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+#  Daily history — persisted per provider, topped up from the last stored bar
+#  (live providers only: replayed bars depend on the replay clock)
+# ─────────────────────────────────────────────────────────────────────────────
+HISTORY_DIR          = os.environ.get("HISTORY_DIR", os.path.join(os.path.dirname(__file__), "data", "history_cache"))
+HISTORY_TAIL_SECONDS = int(os.environ.get("HISTORY_TAIL_SECONDS", LIVE_CACHE_TTL))   # top-up interval
+_TAIL_PERIODS = [("5d", 7), ("1mo", 30), ("3mo", 91), ("6mo", 182), ("1y", 365), ("2y", 730), ("5y", 1826), ("10y", 3652)]
+_history_stores: dict = {}            # provider name -> HistoryStore
+_history_locks: dict = {}             # ticker -> lock (one download per ticker at a time)
+_history_guard = threading.Lock()
+
+
+def _history_store() -> history_store.HistoryStore:
+    name = PROVIDER.name
+    with _history_guard:
+        store = _history_stores.get(name)
+        if store is None:
+            os.makedirs(HISTORY_DIR, exist_ok=True)
+            store = history_store.HistoryStore(os.path.join(HISTORY_DIR, f"{name}.sqlite"))
+            _history_stores[name] = store
+        return store
+
+
+def _history_lock(ticker) -> threading.Lock:
+    with _history_guard:
+        return _history_locks.setdefault(ticker, threading.Lock())
+
+
+def _flat(df) -> pd.DataFrame:
+    """Single-ticker download → plain OHLCV columns."""
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def _daily_bars(ticker: str, period: str) -> pd.DataFrame:
+    """Daily OHLCV for `period`, served from the history store.  The first
+    request for a ticker (or for a longer period than ever stored) downloads
+    the whole period; later ones download only the bars since the last
+    stored date, at most every HISTORY_TAIL_SECONDS.  Providers that don't
+    persist history (the replay) are asked directly every time."""
+    if not getattr(PROVIDER, "persist_history", True):
+        df = PROVIDER.download(ticker, period=period, interval="1d", timeout=15)
+        return _flat(df) if df is not None and not df.empty else pd.DataFrame()
+    store = _history_store()
+    with _history_lock(ticker):
+        cov = store.coverage(ticker)
+        anchor = pd.Timestamp(cov[1]) if cov and cov[1] else PROVIDER.now()
+        start = market_data.period_start(anchor, period)
+        wanted = "" if start is None else start.strftime("%Y-%m-%d")
+
+        if cov is None or cov[0] > wanted:
+            df = PROVIDER.download(ticker, period=period, interval="1d", timeout=15)
+            if df is not None and not df.empty:
+                df = _flat(df)
+                first = market_data.period_start(df.index[-1], period)
+                store.put(ticker, df, covered_from="" if first is None else first.strftime("%Y-%m-%d"))
+                cov = store.coverage(ticker)
+        elif time.time() - cov[2] > HISTORY_TAIL_SECONDS:
+            gap = (PROVIDER.now() - pd.Timestamp(cov[1])).days + 1 if cov[1] else None
+            tail = next((p for p, days in _TAIL_PERIODS if gap is not None and days >= gap), "max")
+            df = PROVIDER.download(ticker, period=tail, interval="1d", timeout=15)
+            store.put(ticker, _flat(df) if df is not None and not df.empty else None)
+            cov = store.coverage(ticker)
+
+    if cov is None or not cov[1]:
+        return pd.DataFrame()
+    start = market_data.period_start(cov[1], period)
+    return store.read(ticker, None if start is None else start.strftime("%Y-%m-%d"))
+
+
+def history_stats() -> dict:
+    return _history_store().stats()
+
+
 def get_history(symbol: str, period: str = "5y") -> list:
     """Daily OHLCV history for a stock. Returns [{date, price, open, high, low, volume}]"""
     yf_ticker = get_yf_ticker(symbol)
     if not yf_ticker:
         return []
     try:
-        df = yf.download(yf_ticker, period=period, interval="1d",
-                         auto_adjust=True, progress=False, timeout=15)
+        df = _daily_bars(yf_ticker, period)
         if df.empty:
             return []
-
-        # Flatten MultiIndex columns if present (single-ticker download sometimes produces them)
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-
-        records = []
-        for ts, row in df.iterrows():
-            try:
-                close  = _safe_float(row["Close"])
-                open_  = _safe_float(row["Open"])
-                high   = _safe_float(row["High"])
-                low    = _safe_float(row["Low"])
-                try:
-                    vol_val = int(_safe_float(row["Volume"]))
-                except Exception:
-                    vol_val = 0
-                records.append({
-                    "date":   ts.strftime("%Y-%m-%d"),
-                    "price":  round(close, 2),
-                    "open":   round(open_, 2),
-                    "high":   round(high,  2),
-                    "low":    round(low,   2),
-                    "volume": vol_val,
-                })
-            except Exception:
-                continue
-        return records
+        close, open_, high, low = (df[c].astype(float).round(2).tolist() for c in ("Close", "Open", "High", "Low"))
+        volume = df["Volume"].fillna(0).astype("int64").tolist()
+        return [
+            {"date": ts.strftime("%Y-%m-%d"), "price": c, "open": o, "high": h, "low": lo, "volume": v}
+            for ts, c, o, h, lo, v in zip(df.index, close, open_, high, low, volume)
+        ]
     except Exception as e:
         print(f"[realtime] history failed for {symbol}: {e}")
         return []
 
 
+def get_recent_closes(period: str = "3mo") -> tuple:
+    """Daily closes of every tracked stock in one bulk download →
+    (ISO dates, symbols, rows × symbols matrix); ([], [], None) on failure."""
+    raw = _download_with_timeout(YF_TICKERS, timeout_secs=30, period=period)
+    if raw is None or raw.empty or not isinstance(raw.columns, pd.MultiIndex):
+        return [], [], None
+    close = raw["Close"].dropna(how="all").sort_index()
+    if close.empty:
+        return [], [], None
+    tickers = [t for t in close.columns if t in YF_TO_SYMBOL]
+    days = [ts.strftime("%Y-%m-%d") for ts in close.index]
+    return days, [YF_TO_SYMBOL[t] for t in tickers], close[tickers].to_numpy(dtype=float)
+
+
 def get_intraday(symbol: str, interval: str = "5m") -> list:
     yf_ticker = get_yf_ticker(symbol)
     if not yf_ticker:
         return []
     try:
-        df = yf.download(yf_ticker, period="1d", interval=interval,
-                         auto_adjust=True, progress=False, timeout=15)
+        df = PROVIDER.download(yf_ticker, period="1d", interval=interval, timeout=15)
         if df.empty:
             return []
 
@@ -387,8 +531,7 @@ def _safe_float(val) -> float:
 
 def get_nifty50_index() -> dict | None:
     try:
-        df = yf.download("^NSEI", period="2d", interval="1d",
-                         auto_adjust=True, progress=False, timeout=15)
+        df = PROVIDER.download("^NSEI", period="2d", interval="1d", timeout=15)
         if df.empty:
             return None
         if isinstance(df.columns, pd.MultiIndex):
@@ -411,18 +554,11 @@ def get_nifty50_index() -> dict | None:
 
 def get_nifty50_history(period: str = "1y") -> list:
     try:
-        df = yf.download("^NSEI", period=period, interval="1d",
-                         auto_adjust=True, progress=False, timeout=15)
+        df = _daily_bars("^NSEI", period)
         if df.empty:
             return []
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
-        df = df.loc[:, ~df.columns.duplicated()]
-        records = []
-        for ts, row in df.iterrows():
-            val = _safe_float(row["Close"])
-            records.append({"Date": ts.strftime("%Y-%m-%d"), "NIFTY": round(val, 2)})
-        return records
+        close = df["Close"].astype(float).round(2).tolist()
+        return [{"Date": ts.strftime("%Y-%m-%d"), "NIFTY": val} for ts, val in zip(df.index, close)]
     except Exception as e:
         print(f"[realtime] NIFTY history failed: {e}")
         return []
@@ -436,13 +572,11 @@ def warmup():
     """Synchronous warmup — blocks until the first set of quotes is loaded."""
     time.sleep(1)
     print("[realtime] Warming up live quotes (synchronous)...")
-    global _quote_cache, _cache_ts, _refreshing
+    global _refreshing
     try:
         fresh = _fetch_all_quotes()
         if fresh:
-            with _cache_lock:
-                _quote_cache = fresh
-                _cache_ts = time.time()
+            _publish(fresh)
             print(f"[realtime] Warmup complete — {len(fresh)} quotes loaded.")
         else:
             print("[realtime] Warmup: no quotes returned (yfinance may be slow).")
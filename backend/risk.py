@@ -0,0 +1,262 @@
+# backend/risk.py
+"""
+Cross-sectional risk engine.
+Daily returns, annualized return, volatility and Sharpe for a whole universe
+in one NumPy pass over an aligned (rows × symbols) price matrix, plus an
+incrementally maintained cache for the default full-history ranking and a
+rolling buffer of recent closes for multi-day momentum.
+"""
+
+import threading
+from bisect import bisect_right
+from math import sqrt
+
+import numpy as np
+
+TRADING_DAYS = 252
+MIN_OBSERVATIONS = 100      # symbols with fewer prices are not ranked
+
+
+def universe_risk_metrics(prices, lookback=None, risk_free_rate=0.0,
+                          trading_days=TRADING_DAYS, min_obs=MIN_OBSERVATIONS) -> dict:
+    """
+    prices          (rows × symbols) array, oldest row first; NaN = no price
+    lookback        use only the last `lookback` daily returns (None = all,
+                    otherwise at least 2)
+    risk_free_rate  annual rate as a decimal (0.065 = 6.5%)
+
+    Returns {"n_obs", "annual_return", "volatility", "sharpe", "valid"} arrays,
+    one entry per column.  Returns/vol are decimals, not percentages.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    if lookback is not None:
+        if int(lookback) < 2:
+            raise ValueError(f"lookback must be at least 2 returns, got {lookback}")
+        prices = prices[-(int(lookback) + 1):]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = prices[1:] / prices[:-1] - 1.0
+        finite = np.isfinite(daily)
+        n_ret = finite.sum(axis=0)
+        daily = np.where(finite, daily, 0.0)
+
+        total    = daily.sum(axis=0)
+        mean_ret = total / n_ret
+        sq_dev   = np.where(finite, daily - mean_ret, 0.0) ** 2
+        vol      = np.sqrt(sq_dev.sum(axis=0) / (n_ret - 1))
+
+        annual_ret = (1 + mean_ret) ** trading_days - 1
+        annual_vol = vol * np.sqrt(trading_days)
+        sharpe     = np.where(annual_vol != 0, (annual_ret - risk_free_rate) / annual_vol, 0.0)
+
+    n_obs = np.isfinite(prices).sum(axis=0)
+    valid = (n_obs >= min_obs) & (n_ret >= 2)
+    return {
+        "n_obs":         n_obs,
+        "annual_return": annual_ret,
+        "volatility":    annual_vol,
+        "sharpe":        sharpe,
+        "valid":         valid,
+    }
+
+
+def _return_sums(prices):
+    """Per-column (n_obs, n_returns, Σr, Σr²) of simple daily returns."""
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        daily = prices[1:] / prices[:-1] - 1.0
+    finite = np.isfinite(daily)
+    daily  = np.where(finite, daily, 0.0)
+    return np.isfinite(prices).sum(axis=0), finite.sum(axis=0), daily.sum(axis=0), (daily ** 2).sum(axis=0)
+
+
+class RiskMetricsCache:
+    """
+    Full-history Sharpe / volatility ranking kept up to date incrementally.
+
+    Each symbol keeps running sums (count, Σr, Σr²) of its daily returns, so
+    a new daily close is an O(1) update and the ranked list is rebuilt only
+    when something changed.  Re-sending the same day (an intraday refresh)
+    replaces that day's return instead of adding another one.
+    """
+
+    def __init__(self, trading_days=TRADING_DAYS, min_obs=MIN_OBSERVATIONS):
+        self.trading_days = trading_days
+        self.min_obs = min_obs
+        self._lock = threading.Lock()
+        self._stats: dict = {}        # sym -> [n_obs, n_ret, Σr, Σr², last_day, last_ret]
+        self._info: dict = {}
+        self._ranked = None
+
+    def seed(self, symbols, prices, last_day, info=None):
+        """(Re)seed symbols from an aligned (rows × symbols) price matrix."""
+        n_obs, n_ret, s, ss = _return_sums(prices)
+        with self._lock:
+            for j, sym in enumerate(symbols):
+                self._stats[sym] = [int(n_obs[j]), int(n_ret[j]), float(s[j]), float(ss[j]), last_day, None]
+                if info:
+                    self._info[sym] = info.get(sym, {})
+            self._ranked = None
+
+    def update(self, symbol, day, ret) -> bool:
+        """Fold one daily return in.  `day` is an ISO date string."""
+        if ret is None or not np.isfinite(ret):
+            return False
+        with self._lock:
+            st = self._stats.get(symbol)
+            if st is None or day is None or (st[4] is not None and day < st[4]):
+                return False
+            if day == st[4]:
+                if st[5] is None:          # seeded bar — already counted
+                    return False
+                st[2] -= st[5]
+                st[3] -= st[5] ** 2
+            else:
+                st[0] += 1
+                st[1] += 1
+            st[2] += ret
+            st[3] += ret ** 2
+            st[4], st[5] = day, ret
+            self._ranked = None
+        return True
+
+    def ranked(self) -> list:
+        with self._lock:
+            if self._ranked is not None:
+                return self._ranked
+            results = []
+            for sym, (n_obs, n, s, ss, _, _) in self._stats.items():
+                if n_obs < self.min_obs or n < 2:
+                    continue
+                mean_ret   = s / n
+                var        = max((ss - s * s / n) / (n - 1), 0.0)
+                annual_ret = (1 + mean_ret) ** self.trading_days - 1
+                annual_vol = sqrt(var) * sqrt(self.trading_days)
+                sharpe     = (annual_ret / annual_vol) if annual_vol != 0 else 0
+                info       = self._info.get(sym, {})
+                results.append({
+                    "symbol":        sym,
+                    "name":          info.get("name", sym),
+                    "sector":        info.get("sector", ""),
+                    "annual_return": round(annual_ret * 100, 2),
+                    "volatility":    round(annual_vol * 100, 2),
+                    "sharpe":        round(sharpe, 2),
+                })
+            self._ranked = sorted(results, key=lambda x: x["sharpe"], reverse=True)
+            return self._ranked
+
+    def __contains__(self, symbol):
+        return symbol in self._stats
+
+    def __len__(self):
+        return len(self._stats)
+
+
+class RollingCloses:
+    """
+    The last `depth` daily closes of a fixed universe in one (depth ×
+    symbols) ring buffer, one row per trading day.
+
+    Seeded once from a price matrix, then extended from live quotes: a quote
+    for a new day opens a new row (symbols without a quote carry their last
+    close forward), a quote for the current day overwrites it.  % change
+    over any window up to depth-1 days is one vectorized row comparison.
+    """
+
+    def __init__(self, symbols, depth=64):
+        self.symbols = list(symbols)
+        self.depth = depth
+        self._col = {s: j for j, s in enumerate(self.symbols)}
+        self._lock = threading.Lock()
+        self._buf = np.full((depth, len(self.symbols)), np.nan)
+        self._days = [None] * depth     # ISO date of each slot
+        self._head = 0                  # slot of the latest day
+        self._filled = 0
+
+    def seed(self, days, symbols, prices):
+        """Load the last `depth` rows of an aligned (rows × symbols) matrix,
+        oldest first, with `days` its ISO row dates.  Symbols outside the
+        universe are ignored; universe symbols not given stay NaN."""
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.ndim == 1:
+            prices = prices[:, None]
+        days, prices = list(days)[-self.depth:], prices[-self.depth:]
+        cols = [(j, self._col[s]) for j, s in enumerate(symbols) if s in self._col]
+        with self._lock:
+            self._buf[:] = np.nan
+            self._days = [None] * self.depth
+            n = len(days)
+            for j, c in cols:
+                self._buf[:n, c] = prices[:, j]
+            self._days[:n] = days
+            self._head = max(n - 1, 0)
+            self._filled = n
+
+    def seed_column(self, symbol, days, prices):
+        """Fill one symbol from its own ascending (ISO date, close) history:
+        each buffered day gets the symbol's last close on or before it."""
+        c = self._col.get(symbol)
+        if c is None:
+            return
+        days, prices = list(days), np.asarray(prices, dtype=np.float64)
+        with self._lock:
+            for slot in self._ordered_slots():
+                k = bisect_right(days, self._days[slot]) - 1
+                self._buf[slot, c] = prices[k] if k >= 0 else np.nan
+
+    def _ordered_slots(self):
+        """Slot indices oldest → newest.  Caller holds the lock."""
+        start = (self._head - self._filled + 1) % self.depth
+        return [(start + k) % self.depth for k in range(self._filled)]
+
+    @property
+    def last_day(self):
+        with self._lock:
+            return self._days[self._head] if self._filled else None
+
+    def update(self, day, closes: dict) -> bool:
+        """Fold {symbol: close} for ISO `day` in.  Older days are ignored."""
+        if not day or not closes:
+            return False
+        with self._lock:
+            latest = self._days[self._head] if self._filled else None
+            if latest is not None and day < latest:
+                return False
+            if latest is not None and day > latest:
+                prev = self._buf[self._head].copy()
+                self._head = (self._head + 1) % self.depth
+                self._buf[self._head] = prev
+                self._filled = min(self._filled + 1, self.depth)
+            elif latest is None:
+                self._filled = 1
+            self._days[self._head] = day
+            for sym, close in closes.items():
+                c = self._col.get(sym)
+                if c is not None and close is not None and np.isfinite(close):
+                    self._buf[self._head, c] = close
+        return True
+
+    def pct_change(self, days) -> np.ndarray:
+        """% change of every symbol over the last `days` trading days (NaN
+        where the buffer does not reach back that far)."""
+        with self._lock:
+            if days >= self._filled:
+                return np.full(len(self.symbols), np.nan)
+            now  = self._buf[self._head]
+            then = self._buf[(self._head - days) % self.depth]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (now / then - 1.0) * 100.0
+
+    def momentum(self, windows=(5, 20)) -> dict:
+        """{symbol: {window: % change}} for every symbol with finite values."""
+        changes = {w: self.pct_change(w) for w in windows}
+        out = {}
+        for j, sym in enumerate(self.symbols):
+            vals = {w: float(changes[w][j]) for w in windows if np.isfinite(changes[w][j])}
+            if vals:
+                out[sym] = vals
+        return out
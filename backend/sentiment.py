@@ -0,0 +1,230 @@
+# backend/sentiment.py
+"""
+News sentiment (newsdata.io + TextBlob) behind a shared cache.
+
+Results are cached per symbol for SENTIMENT_TTL seconds and then served
+stale for up to SENTIMENT_STALE_SECONDS more while one background refresh
+runs, so the rate-limited news API sees at most one call per symbol per
+TTL no matter how many users open the same stock.  Concurrent misses share
+one request.  NEWS_API_URL can point at a local stand-in (news_stub.py).
+
+Article polarities are cached separately, keyed on a hash of the article
+text, and scored a page at a time through score_texts(), so the same
+headlines coming back on every refresh cost no CPU after the first time.
+
+SENTIMENT_PROVIDER=offline answers from a precomputed per-symbol index of
+a local headline dump instead (sentiment_index.py, SENTIMENT_CSV) — no
+network, for load tests and air-gapped staging.
+"""
+
+import hashlib
+import os
+
+import requests
+from dotenv import load_dotenv
+from textblob import TextBlob
+
+import caching
+import realtime as rt
+
+load_dotenv()
+NEWS_API_KEY = os.getenv("NEWSCATCHER_API_KEY")  # make sure .env has this
+NEWS_API_URL = os.environ.get("NEWS_API_URL", "https://newsdata.io/api/1/news")
+NEWS_TIMEOUT = 10
+
+SENTIMENT_TTL           = int(os.environ.get("SENTIMENT_TTL", 900))              # 15 minutes
+SENTIMENT_STALE_SECONDS = int(os.environ.get("SENTIMENT_STALE_SECONDS", 3600))
+SENTIMENT_CACHE_SIZE    = int(os.environ.get("SENTIMENT_CACHE_SIZE", 256))
+POLARITY_CACHE_SIZE     = int(os.environ.get("POLARITY_CACHE_SIZE", 20000))   # articles
+
+SENTIMENT_PROVIDER = os.environ.get("SENTIMENT_PROVIDER", "newsdata").lower()   # newsdata | offline
+SENTIMENT_CSV      = os.environ.get("SENTIMENT_CSV")       # offline headline dump (default: sample)
+
+# ============================
+#  SYMBOL → REAL COMPANY NAME MAP (for news query)
+# ============================
+SYMBOL_MAP = {
+    "RELIANCE":    "Reliance Industries",
+    "TCS":         "Tata Consultancy Services",
+    "HDFCBANK":    "HDFC Bank",
+    "INFY":        "Infosys",
+    "ICICIBANK":   "ICICI Bank",
+    "HINDUNILVR":  "Hindustan Unilever",
+    "SBIN":        "State Bank of India",
+    "BHARTIARTL":  "Bharti Airtel",
+    "KOTAKBANK":   "Kotak Mahindra Bank",
+    "WIPRO":       "Wipro",
+    "HCLTECH":     "HCL Technologies",
+    "AXISBANK":    "Axis Bank",
+    "ASIANPAINT":  "Asian Paints",
+    "MARUTI":      "Maruti Suzuki",
+    "BAJAJ-AUTO":  "Bajaj Auto",
+    "MM":          "Mahindra Mahindra",
+    "TATASTEEL":   "Tata Steel",
+    "HINDALCO":    "Hindalco Industries",
+    "SUNPHARMA":   "Sun Pharmaceutical",
+    "DRREDDY":     "Dr Reddy Laboratories",
+    "CIPLA":       "Cipla",
+    "NTPC":        "NTPC",
+    "POWERGRID":   "Power Grid Corporation",
+    "COALINDIA":   "Coal India",
+    "ONGC":        "ONGC Oil Gas",
+    "ITC":         "ITC India",
+    "LT":          "Larsen Toubro",
+    "ULTRACEMCO":  "UltraTech Cement",
+    "TECHM":       "Tech Mahindra",
+    "ADANIPORTS":  "Adani Ports",
+}
+
+
+def clean_symbol(symbol) -> str:
+    return rt.resolve(symbol) or symbol.split("_")[-1].upper()
+
+
+def news_keyword(clean) -> str:
+    # Use the full display name for better news results
+    keyword = rt.get_display_name(clean)
+    if keyword == clean:
+        keyword = SYMBOL_MAP.get(clean, clean)
+    return keyword
+
+
+def neutral(symbol) -> dict:
+    return {"symbol": symbol, "score": 0.0, "label": "NEUTRAL", "news": []}
+
+
+class NewsAPIError(RuntimeError):
+    """newsdata.io answered with an error payload (bad key, rate limit ...)."""
+
+
+def fetch_articles(keyword) -> list:
+    """Raw newsdata.io results for keyword.  Network errors, HTTP errors and
+    error payloads are raised, so they are never scored (and cached) as
+    an empty, NEUTRAL news list."""
+    params = {
+        "apikey": NEWS_API_KEY,
+        "q": keyword,
+        "language": "en",
+        "country": "in",
+    }
+    res = requests.get(NEWS_API_URL, params=params, timeout=NEWS_TIMEOUT)
+    res.raise_for_status()
+    payload = res.json()
+    if payload.get("status") != "success":
+        detail = payload.get("results") or payload.get("message") or payload
+        raise NewsAPIError(f"news API {payload.get('status')!r}: {detail}")
+    return payload.get("results") or []
+
+
+# ── Article polarity: content-addressed cache + batch scorer ───────────────
+def textblob_scorer(texts) -> list:
+    """Default batch scorer: TextBlob polarity in [-1, 1] per text."""
+    return [TextBlob(t).sentiment.polarity for t in texts]
+
+
+_scorer = textblob_scorer
+_polarity_cache = caching.TTLCache(maxsize=POLARITY_CACHE_SIZE)
+
+
+def set_scorer(fn):
+    """Swap the batch scorer (list of texts → list of polarities), e.g. for a
+    local model.  Cached polarities from the previous scorer are dropped."""
+    global _scorer
+    _scorer = fn
+    _polarity_cache.clear()
+
+
+def _text_key(text) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def score_texts(texts) -> list:
+    """Polarity per text.  Cached texts are looked up by content hash; the
+    rest (deduplicated) go to the scorer in a single call."""
+    keys = [_text_key(t) for t in texts]
+    scores = {k: _polarity_cache.get(k) for k in set(keys)}
+    missing = {k: t for k, t in zip(keys, texts) if scores[k] is None}
+    if missing:
+        for k, polarity in zip(missing, _scorer(list(missing.values()))):
+            scores[k] = float(polarity)
+            _polarity_cache.set(k, scores[k])
+    return [scores[k] for k in keys]
+
+
+def score_articles(symbol, articles) -> dict:
+    if not articles:
+        return neutral(symbol)
+
+    texts = [f"{a.get('title', '')} {a.get('description', '') or ''}" for a in articles]
+    sentiments = score_texts(texts)
+
+    news_list = [
+        {
+            "title": article.get("title", ""),
+            "description": article.get("description", "") or "",
+            "published": article.get("pubDate", ""),
+            "sentiment_score": round(polarity, 3)
+        }
+        for article, polarity in zip(articles, sentiments)
+    ]
+
+    score = sum(sentiments) / len(sentiments) if sentiments else 0.0
+    if score > 0.1:
+        label = "POSITIVE"
+    elif score < -0.1:
+        label = "NEGATIVE"
+    else:
+        label = "NEUTRAL"
+
+    return {
+        "symbol": symbol,
+        "score": round(score, 3),
+        "label": label,
+        "news": news_list
+    }
+
+
+def load_sentiment(clean) -> dict:
+    """Uncached fetch + score for a clean symbol."""
+    return score_articles(clean, fetch_articles(news_keyword(clean)))
+
+
+_cache = caching.RefreshingCache(load_sentiment, ttl=SENTIMENT_TTL,
+                                 stale_ttl=SENTIMENT_STALE_SECONDS, maxsize=SENTIMENT_CACHE_SIZE)
+
+
+_offline_index = None
+
+
+def offline_index() -> dict:
+    """Per-symbol index of the local headline dump (built once per process)."""
+    global _offline_index
+    if _offline_index is None:
+        import sentiment_index
+        path = SENTIMENT_CSV or sentiment_index.SAMPLE_CSV
+        index_path = sentiment_index.INDEX_PATH if path == sentiment_index.SAMPLE_CSV else f"{path}.index.json"
+        _offline_index = sentiment_index.load_index(path, index_path)
+    return _offline_index
+
+
+def get_sentiment(symbol) -> dict:
+    """Cached sentiment for symbol; NEUTRAL when the news API fails."""
+    if SENTIMENT_PROVIDER == "offline":
+        entry = offline_index().get(clean_symbol(symbol))
+        if not entry:
+            return neutral(symbol)
+        return {"symbol": symbol, "score": entry["score"], "label": entry["label"], "news": entry["news"]}
+    try:
+        result = _cache.get(clean_symbol(symbol))
+    except Exception as e:
+        print("Sentiment Error:", e)
+        return neutral(symbol)
+    return {**result, "symbol": symbol}
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+def polarity_stats() -> dict:
+    return _polarity_cache.stats()
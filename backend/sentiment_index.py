@@ -0,0 +1,153 @@
+# backend/sentiment_index.py
+"""
+Offline sentiment index built from a headline dump.
+
+    data/sentiment_sample.csv      symbol,headline[,description,published]
+    data/sentiment_index.json      per-symbol aggregate score, label and the
+                                   latest headlines with their polarities
+
+Symbols may use the legacy CSV names (IT_TCS, AUTO_M_M, TEL_BHARTIARTL …);
+they are normalised to the clean symbols used everywhere else.  Headlines
+are scored in batches through sentiment.score_texts, so any size of dump
+is a single streaming pass.  The index is rebuilt automatically when the
+source file's mtime changes.
+
+Build from the command line (run inside backend/):
+    python -m sentiment_index                       # sample CSV → index
+    python -m sentiment_index --csv big_dump.csv --out big_index.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from collections import defaultdict, deque
+
+import realtime as rt
+import sentiment
+
+BASE_DIR     = os.path.dirname(__file__)
+SAMPLE_CSV   = os.path.join(BASE_DIR, "data", "sentiment_sample.csv")
+INDEX_PATH   = os.path.join(BASE_DIR, "data", "sentiment_index.json")
+
+INDEX_VERSION    = 1
+NEWS_PER_SYMBOL  = 20        # headlines kept per symbol (the score uses all)
+SCORE_BATCH      = 5000
+
+
+def normalize_symbol(symbol) -> str:
+    """Legacy CSV symbol → clean symbol (IT_TCS → TCS, AUTO_M_M → MM,
+    AUTO_BAJAJ_AUTO → BAJAJ-AUTO, _METAL_TATASTEEL → TATASTEEL)."""
+    s = symbol.strip().strip("_").upper()
+    clean = rt.resolve(s)
+    if clean:
+        return clean
+    rest = s.split("_", 1)[1] if "_" in s else s
+    for candidate in (rest, rest.replace("_", "-"), rest.replace("_", "")):
+        if candidate in rt.STOCKS:
+            return candidate
+    return rest
+
+
+def label_for(score) -> str:
+    if score > 0.1:
+        return "POSITIVE"
+    if score < -0.1:
+        return "NEGATIVE"
+    return "NEUTRAL"
+
+
+def build_index(path=SAMPLE_CSV) -> dict:
+    """Stream the headline CSV → {clean symbol: {score, label, count, news}}."""
+    totals = defaultdict(lambda: [0.0, 0])                  # sym -> [Σ polarity, n]
+    news = defaultdict(lambda: deque(maxlen=NEWS_PER_SYMBOL))
+    batch = []
+
+    def flush():
+        scores = sentiment.score_texts([text for _, text, _ in batch])
+        for (sym, _, item), polarity in zip(batch, scores):
+            totals[sym][0] += polarity
+            totals[sym][1] += 1
+            item["sentiment_score"] = round(polarity, 3)
+            news[sym].append(item)
+        batch.clear()
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            title = (row.get("headline") or row.get("title") or "").strip()
+            if not title or not row.get("symbol"):
+                continue
+            desc = row.get("description", "") or ""
+            item = {"title": title, "description": desc,
+                    "published": row.get("published") or row.get("pubDate") or ""}
+            batch.append((normalize_symbol(row["symbol"]), f"{title} {desc}", item))
+            if len(batch) >= SCORE_BATCH:
+                flush()
+    if batch:
+        flush()
+
+    index = {}
+    for sym, (total, n) in totals.items():
+        score = total / n
+        index[sym] = {
+            "score": round(score, 3),
+            "label": label_for(score),
+            "count": n,
+            "news":  list(reversed(news[sym])),              # newest (last in file) first
+        }
+    return index
+
+
+def write_index(index, out_path=INDEX_PATH, source=None, source_mtime=None):
+    """Write atomically (temp file + os.replace)."""
+    payload = {
+        "version":      INDEX_VERSION,
+        "source":       source,
+        "source_mtime": source_mtime,
+        "created_at":   time.time(),
+        "symbols":      index,
+    }
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, out_path)
+
+
+def load_index(path=SAMPLE_CSV, index_path=INDEX_PATH) -> dict:
+    """Precomputed index for path, rebuilding it if the source changed."""
+    mtime = os.path.getmtime(path)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") == INDEX_VERSION and payload.get("source_mtime") == mtime:
+            return payload["symbols"]
+    except (OSError, ValueError):
+        pass
+
+    t0 = time.time()
+    index = build_index(path)
+    try:
+        write_index(index, index_path, source=os.path.basename(path), source_mtime=mtime)
+    except OSError as e:
+        print(f"[sentiment] Could not write index {index_path}: {e}")
+    print(f"[sentiment] Indexed {sum(v['count'] for v in index.values())} headlines "
+          f"for {len(index)} symbols in {time.time()-t0:.2f}s")
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the offline sentiment index.")
+    parser.add_argument("--csv", default=SAMPLE_CSV)
+    parser.add_argument("--out", default=INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    t0 = time.time()
+    index = build_index(args.csv)
+    write_index(index, args.out, source=os.path.basename(args.csv), source_mtime=os.path.getmtime(args.csv))
+    print(f"[sentiment] Wrote {len(index)} symbols "
+          f"({sum(v['count'] for v in index.values())} headlines) to {args.out} in {time.time()-t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# backend/snapshot.py
+"""
+Columnar binary snapshot of the historical price matrix.
+
+    data/market_snapshot/
+        dates.npy    datetime64[ns] vector (one entry per row)
+        prices.npy   (rows × symbols) float64/float32 matrix, column-major
+        meta.json    column names, dtype and the source CSV mtime
+
+Both .npy files are memory-mapped read-only, so every gunicorn worker on a
+host shares one page-cached copy instead of holding its own DataFrame.
+
+Compile from the command line (run inside backend/):
+    python -m snapshot                  # market_data.csv → snapshot
+    python -m snapshot --with-live      # also merge rt.get_history() bars
+    python -m snapshot --dtype float32
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR     = os.path.dirname(__file__)
+DATA_CSV     = os.path.join(BASE_DIR, "data", "market_data.csv")
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "data", "market_snapshot")
+
+SNAPSHOT_VERSION = 1
+
+
+def parse_wide_csv(path: str):
+    """Parse a wide Date + tickers CSV → (DatetimeIndex, columns, matrix).
+    Rows with no prices are dropped, rows are sorted by date and gaps are
+    forward/back filled — the same cleaning read_timeseries() always did."""
+    df = pd.read_csv(path)
+    if "Date" not in df.columns:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    price_cols = [c for c in df.columns if c != "Date"]
+    df = df.dropna(how="all", subset=price_cols)
+    df = df.sort_values("Date").reset_index(drop=True)
+
+    # Fill missing stock prices
+    df = df.ffill().bfill()
+    matrix = df[price_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    return pd.DatetimeIndex(df["Date"]), price_cols, matrix
+
+
+def merge_history(dates, columns, matrix, histories: dict):
+    """Merge {column: [{date, price, ...}]} records (rt.get_history format)
+    into the matrix.  Live bars win on overlapping dates and extend the
+    series past the CSV's last row; new columns are appended."""
+    df = pd.DataFrame(matrix, columns=columns, index=dates)
+    for col, records in histories.items():
+        if not records:
+            continue
+        live = pd.Series(
+            [r["price"] for r in records],
+            index=pd.to_datetime([r["date"] for r in records]),
+            dtype=float,
+        )
+        live = live[~live.index.duplicated(keep="last")]
+        df = df.reindex(df.index.union(live.index))
+        if col in df.columns:
+            df.loc[live.index, col] = live.values
+        else:
+            df[col] = live
+    df = df.sort_index().ffill().bfill()
+    return pd.DatetimeIndex(df.index), list(df.columns), df.to_numpy(dtype=np.float64)
+
+
+def write_snapshot(out_dir, dates, columns, matrix, source_mtime=None, dtype="float64"):
+    """Write the snapshot atomically: each file goes to a temp name first and
+    meta.json (the freshness marker) is replaced last."""
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = f"{os.getpid()}.{time.time_ns()}"
+
+    def _replace(name, writer):
+        tmp = os.path.join(out_dir, f".{name}.{stamp}.tmp")
+        with open(tmp, "wb") as f:
+            writer(f)
+        os.replace(tmp, os.path.join(out_dir, name))
+
+    date_vec = np.asarray(dates.values, dtype="datetime64[ns]")
+    prices   = np.asfortranarray(matrix, dtype=dtype)
+    _replace("dates.npy",  lambda f: np.save(f, date_vec))
+    _replace("prices.npy", lambda f: np.save(f, prices))
+
+    meta = {
+        "version":      SNAPSHOT_VERSION,
+        "columns":      list(columns),
+        "rows":         int(prices.shape[0]),
+        "dtype":        str(prices.dtype),
+        "source_mtime": source_mtime,
+        "created_at":   time.time(),
+    }
+    _replace("meta.json", lambda f: f.write(json.dumps(meta).encode()))
+    return meta
+
+
+def read_meta(out_dir) -> dict | None:
+    try:
+        with open(os.path.join(out_dir, "meta.json")) as f:
+            meta = json.load(f)
+        return meta if meta.get("version") == SNAPSHOT_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def load_snapshot(out_dir):
+    """Memory-map a snapshot → (DatetimeIndex, columns, matrix, meta) or None."""
+    meta = read_meta(out_dir)
+    if meta is None:
+        return None
+    try:
+        dates  = np.load(os.path.join(out_dir, "dates.npy"), mmap_mode="r")
+        matrix = np.load(os.path.join(out_dir, "prices.npy"), mmap_mode="r")
+    except (OSError, ValueError) as e:
+        print(f"[snapshot] Failed to map {out_dir}: {e}")
+        return None
+    if matrix.shape != (len(dates), len(meta["columns"])):
+        print(f"[snapshot] Shape mismatch in {out_dir} — ignoring")
+        return None
+    return pd.DatetimeIndex(dates), meta["columns"], matrix, meta
+
+
+def compile_snapshot(csv_path=DATA_CSV, out_dir=SNAPSHOT_DIR, dtype="float64", histories=None):
+    """CSV (+ optional live histories) → snapshot.  Returns the meta dict."""
+    mtime = os.path.getmtime(csv_path)
+    dates, columns, matrix = parse_wide_csv(csv_path)
+    if histories:
+        dates, columns, matrix = merge_history(dates, columns, matrix, histories)
+    return write_snapshot(out_dir, dates, columns, matrix, source_mtime=mtime, dtype=dtype)
+
+
+def _fetch_live_histories(period):
+    """{column: records} for every tracked symbol, keyed by its CSV column
+    when the CSV already has one so live bars extend that series."""
+    import realtime as rt
+    sym_to_col = {v: k for k, v in rt.CSV_TO_SYMBOL.items()}
+    histories = {}
+    for sym in rt.SYMBOL_LIST:
+        records = rt.get_history(sym, period=period)
+        print(f"[snapshot]   {sym}: {len(records)} bars")
+        histories[sym_to_col.get(sym, sym)] = records
+    return histories
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile market_data.csv into a memory-mappable snapshot.")
+    parser.add_argument("--csv", default=DATA_CSV)
+    parser.add_argument("--out", default=SNAPSHOT_DIR)
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64")
+    parser.add_argument("--with-live", action="store_true", help="merge yfinance history from rt.get_history")
+    parser.add_argument("--period", default="5y", help="history period used with --with-live")
+    args = parser.parse_args(argv)
+
+    t0 = time.time()
+    histories = _fetch_live_histories(args.period) if args.with_live else None
+    meta = compile_snapshot(args.csv, args.out, dtype=args.dtype, histories=histories)
+    print(f"[snapshot] Wrote {meta['rows']} rows × {len(meta['columns'])} symbols "
+          f"({meta['dtype']}) to {args.out} in {time.time()-t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# backend/views.py
+"""
+Derived market views (movers, most bought, market insights).
+
+The views are pure functions of the quote dict.  ViewCache computes all of
+them once per quote-cache version — right after each refresh, as a
+realtime listener — and keeps them as serialized JSON bytes, so serving
+one is a memory copy instead of a walk + sort over the universe.
+"""
+
+import threading
+from datetime import datetime
+
+import realtime as rt
+
+TOP_MOVERS = 10
+TOP_VOLUME = 8
+TOP_MOMENTUM = 10
+
+# momentum_score = 0.6 × 5-day % change + 0.4 × 20-day % change
+MOMENTUM_WEIGHTS = {5: 0.6, 20: 0.4}
+
+
+def _today() -> str:
+    return datetime.now().strftime("%d-%m-%Y")
+
+
+def market_movers(quotes) -> dict | None:
+    """Top gainers / losers by % change, or None without live quotes."""
+    movers = []
+    for sym, info in rt.STOCKS.items():
+        q = quotes.get(sym)
+        if not q:
+            continue
+        movers.append({
+            "symbol":     sym,
+            "name":       info["name"],
+            "sector":     info["sector"],
+            "ltp":        q["ltp"],
+            "change":     q["change"],
+            "pct_change": q["change_pct"],
+            "open":       q.get("open"),
+            "high":       q.get("high"),
+            "low":        q.get("low"),
+            "volume":     q.get("volume"),
+            "source":     "live",
+        })
+    if not movers:
+        return None
+    return {
+        "date":    _today(),
+        "gainers": sorted(movers, key=lambda r: r["pct_change"], reverse=True)[:TOP_MOVERS],
+        "losers":  sorted(movers, key=lambda r: r["pct_change"])[:TOP_MOVERS],
+    }
+
+
+def most_bought(quotes) -> dict | None:
+    """Highest-volume stock (highest % gain when volumes are unknown) plus the
+    top 8 by volume, or None without live quotes."""
+    changes = []
+    for sym, info in rt.STOCKS.items():
+        q = quotes.get(sym)
+        if not q:
+            continue
+        changes.append({
+            "symbol":     sym,
+            "name":       info["name"],
+            "sector":     info["sector"],
+            "ltp":        q["ltp"],
+            "pct_change": q["change_pct"],
+            "volume":     q.get("volume", 0),
+        })
+    if not changes:
+        return None
+
+    by_volume = sorted(changes, key=lambda r: r["volume"] or 0, reverse=True)
+    if by_volume[0]["volume"]:
+        top = by_volume[0]
+    else:
+        top = max(changes, key=lambda r: r["pct_change"])
+    return {
+        "date":       _today(),
+        "symbol":     top["symbol"],
+        "name":       top["name"],
+        "ltp":        top["ltp"],
+        "pct_change": top["pct_change"],
+        "volume":     int(top.get("volume") or 0),
+        "top_stocks": by_volume[:TOP_VOLUME],
+        "source":     "live",
+    }
+
+
+def market_insights(quotes, momentum=None) -> dict:
+    """Breadth, per-sector aggregates and momentum leaders.  `momentum` is
+    {symbol: {5: pct, 20: pct}} from the rolling close buffer; a symbol
+    without it falls back to its 1-day change."""
+    momentum = momentum or {}
+    advancers = decliners = unchanged = 0
+    sector_stats = {}
+    momentum_rows = []
+
+    for sym, info in rt.STOCKS.items():
+        q = quotes.get(sym)
+        if not q:
+            continue
+        pct = q["change_pct"]
+        sector = info.get("sector", "Other")
+
+        if pct > 0:
+            advancers += 1
+        elif pct < 0:
+            decliners += 1
+        else:
+            unchanged += 1
+
+        if sector not in sector_stats:
+            sector_stats[sector] = {"sector": sector, "advancers": 0, "decliners": 0, "unchanged": 0, "sum_pct": 0.0, "count": 0}
+        ss = sector_stats[sector]
+        if pct > 0:   ss["advancers"] += 1
+        elif pct < 0: ss["decliners"] += 1
+        else:         ss["unchanged"] += 1
+        ss["sum_pct"] += pct
+        ss["count"]   += 1
+
+        m = momentum.get(sym, {})
+        pct_5d, pct_20d = m.get(5, pct), m.get(20, pct)
+        momentum_rows.append({
+            "symbol":          sym,
+            "name":            info["name"],
+            "pct_5d":          round(pct_5d, 2),
+            "pct_20d":         round(pct_20d, 2),
+            "momentum_score":  round(MOMENTUM_WEIGHTS[5] * pct_5d + MOMENTUM_WEIGHTS[20] * pct_20d, 2),
+        })
+
+    adv_decl_ratio = (advancers / decliners) if decliners != 0 else None
+
+    sectors = []
+    for sec, ss in sector_stats.items():
+        avg_move = ss["sum_pct"] / ss["count"] if ss["count"] > 0 else 0.0
+        sectors.append({
+            "sector":    sec,
+            "advancers": ss["advancers"],
+            "decliners": ss["decliners"],
+            "unchanged": ss["unchanged"],
+            "avg_move":  round(avg_move, 2),
+        })
+
+    return {
+        "date": _today(),
+        "breadth": {
+            "advancers":     advancers,
+            "decliners":     decliners,
+            "unchanged":     unchanged,
+            "adv_decl_ratio": round(adv_decl_ratio, 2) if adv_decl_ratio else None,
+        },
+        "sectors":  sectors,
+        "momentum": sorted(momentum_rows, key=lambda x: x["momentum_score"], reverse=True)[:TOP_MOMENTUM],
+    }
+
+
+VIEWS = {
+    "market_movers":   market_movers,
+    "most_bought":     most_bought,
+    "market_insights": market_insights,
+}
+
+
+class ViewCache:
+    """Serialized views for the current quote version.  `dumps` turns a
+    view dict into a JSON string (the Flask app's serializer, so bodies are
+    identical to jsonify's).  A view that is None (no live quotes) stays
+    None so the endpoint can use its fallback."""
+
+    def __init__(self, dumps, views=VIEWS):
+        self._dumps = dumps
+        self._views = views
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()     # one rebuild at a time
+        self._key = None
+        self._bodies: dict = {}
+        self.builds = 0
+
+    def refresh(self, fresh=None):
+        """Refresh listener: rebuild every view for the new quote version.
+        Builds are serialized; callers that queued behind a build for the
+        same version return without building again."""
+        with self._build_lock:
+            version, quotes, _ = rt.quote_snapshot()
+            key = (version, _today())
+            with self._lock:
+                if key == self._key:
+                    return
+            bodies = {}
+            for name, fn in self._views.items():
+                try:
+                    view = fn(quotes)
+                except Exception as e:
+                    print(f"[views] {name} failed: {e}")
+                    view = None
+                bodies[name] = self._dumps(view).encode() if view is not None else None
+            with self._lock:
+                self._key, self._bodies = key, bodies
+                self.builds += 1
+
+    def get(self, name) -> bytes | None:
+        """Serialized view; rebuilt first if the quotes or the date moved on
+        since the last build (e.g. before the first refresh listener ran)."""
+        rt.get_all_quotes()                     # kicks a background refresh if stale
+        key = (rt.quote_snapshot()[0], _today())
+        with self._lock:
+            if key == self._key:
+                return self._bodies.get(name)
+        self.refresh()
+        with self._lock:
+            return self._bodies.get(name)